@@ -0,0 +1,363 @@
+import json
+import time
+import random
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ======================================================
+# LOCAL STAND-INS FOR SUPABASE (PostgREST), JINA, GEMINI
+# ======================================================
+# Just enough of each wire protocol for the app's own client code
+# (supabase-py, requests, google-generativeai REST transport) to run
+# unmodified against localhost, with configurable latency and errors.
+
+EMBED_DIM = 768
+
+
+def fake_embedding(text: str, dim: int = EMBED_DIM):
+    """
+    Deterministic pseudo-random unit vector per text.
+    """
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+    rng = random.Random(seed)
+    vec = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = sum(v * v for v in vec) ** 0.5 or 1.0
+    return [v / norm for v in vec]
+
+
+class Behaviour:
+    """
+    Latency (seconds, +/- jitter) and error rate for one service.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.2,
+                 error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def apply(self) -> bool:
+        """
+        Sleeps for the simulated latency; True means "fail this call".
+        """
+        if self.latency:
+            spread = self.latency * self.jitter
+            time.sleep(max(0.0, random.uniform(
+                self.latency - spread, self.latency + spread
+            )))
+        return random.random() < self.error_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    behaviour = Behaviour()
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else None
+
+    def _send(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _maybe_fail(self) -> bool:
+        if self.behaviour.apply():
+            self._send(503, {"message": "simulated outage"})
+            return True
+        return False
+
+
+# ------------------------------
+# PostgREST
+# ------------------------------
+class PostgrestStore:
+
+    def __init__(self):
+        self.tables = {}
+        self.next_id = {}
+        self.lock = threading.Lock()
+
+    def insert(self, table, rows, upsert_on=None):
+        out = []
+        with self.lock:
+            data = self.tables.setdefault(table, [])
+            for row in rows:
+                row = dict(row)
+                if upsert_on and row.get(upsert_on) is not None:
+                    match = next(
+                        (r for r in data if r.get(upsert_on) == row[upsert_on]),
+                        None
+                    )
+                    if match is not None:
+                        match.update(row)
+                        out.append(dict(match))
+                        continue
+                if "id" not in row:
+                    row["id"] = self.next_id.get(table, 1)
+                self.next_id[table] = max(
+                    self.next_id.get(table, 1), row["id"] + 1
+                )
+                data.append(row)
+                out.append(dict(row))
+        return out
+
+    def rows(self, table):
+        with self.lock:
+            return list(self.tables.get(table, []))
+
+    def delete(self, table, predicate):
+        with self.lock:
+            data = self.tables.get(table, [])
+            gone = [r for r in data if predicate(r)]
+            self.tables[table] = [r for r in data if not predicate(r)]
+        return gone
+
+
+def _coerce(value, sample):
+    if isinstance(sample, bool):
+        return value == "true"
+    if isinstance(sample, int):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _predicate(params):
+    tests = []
+    for col, values in params.items():
+        if col in ("select", "order", "limit", "offset", "on_conflict"):
+            continue
+        for expr in values:
+            op, _, arg = expr.partition(".")
+            tests.append((col, op, arg))
+
+    def match(row):
+        for col, op, arg in tests:
+            v = row.get(col)
+            if op == "eq" and v != _coerce(arg, v):
+                return False
+            if op == "gt" and not (v is not None and v > _coerce(arg, v)):
+                return False
+            if op == "in":
+                options = [
+                    _coerce(a.strip().strip('"'), v)
+                    for a in arg.strip("()").split(",")
+                ]
+                if v not in options:
+                    return False
+        return True
+
+    return match
+
+
+def make_postgrest_handler(store: PostgrestStore, behaviour: Behaviour,
+                           rpcs: dict):
+
+    class Handler(_Handler):
+
+        def _parse(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")  # rest, v1, table...
+            return parts[2:], parse_qs(url.query)
+
+        def _select(self, rows, params):
+            if "order" in params:
+                col, _, direction = params["order"][0].partition(".")
+                rows.sort(
+                    key=lambda r: r.get(col) or 0,
+                    reverse=direction.startswith("desc")
+                )
+            if "limit" in params:
+                rows = rows[:int(params["limit"][0])]
+            cols = params.get("select", ["*"])[0]
+            if cols != "*":
+                keep = cols.split(",")
+                rows = [{k: r.get(k) for k in keep} for r in rows]
+            return rows
+
+        def do_GET(self):
+            if self._maybe_fail():
+                return
+            path, params = self._parse()
+            matched = [
+                r for r in store.rows(path[0]) if _predicate(params)(r)
+            ]
+            headers = {}
+            if "count=exact" in (self.headers.get("Prefer") or ""):
+                n = len(matched)
+                headers["Content-Range"] = f"0-{n - 1}/{n}" if n else "*/0"
+            self._send(200, self._select(matched, params), headers)
+
+        do_HEAD = do_GET
+
+        def do_POST(self):
+            if self._maybe_fail():
+                return
+            path, params = self._parse()
+            body = self._body()
+
+            if path[0] == "rpc":
+                fn = rpcs.get(path[1])
+                if fn is None:
+                    self._send(404, {"message": f"no function {path[1]}"})
+                    return
+                self._send(200, fn(store, body or {}))
+                return
+
+            rows = body if isinstance(body, list) else [body]
+            upsert_on = None
+            if "merge-duplicates" in (self.headers.get("Prefer") or ""):
+                upsert_on = params.get("on_conflict", ["id"])[0]
+            self._send(201, store.insert(path[0], rows, upsert_on))
+
+        def do_DELETE(self):
+            if self._maybe_fail():
+                return
+            path, params = self._parse()
+            self._send(200, store.delete(path[0], _predicate(params)))
+
+    Handler.behaviour = behaviour
+    return Handler
+
+
+def _rpc_match_articles(store, body):
+    query = fake_embedding(body.get("query_text", ""))
+    scored = []
+    for r in store.rows("constitution_articles"):
+        vec = r.get("embedding") or []
+        scored.append((sum(a * b for a, b in zip(query, vec)), r))
+    scored.sort(key=lambda s: -s[0])
+    return [
+        {
+            "id": r["id"],
+            "article_title": r["article_title"],
+            "article_text": r["article_text"],
+            "similarity": score
+        }
+        for score, r in scored[:int(body.get("match_count", 5))]
+    ]
+
+
+def _rpc_case_history(store, body):
+    case_id = body.get("p_case_id")
+    by_case = {
+        "claims": ["id", "case_id", "side", "text"],
+        "evidence": ["id", "case_id", "side", "file_name", "hash"],
+        "facts": ["id", "case_id", "facts"]
+    }
+    out = {
+        "incident": [
+            {k: r.get(k) for k in ("id", "title", "description")}
+            for r in store.rows("incidents") if r.get("id") == case_id
+        ]
+    }
+    for table, cols in by_case.items():
+        out[table] = [
+            {k: r.get(k) for k in cols}
+            for r in store.rows(table) if r.get("case_id") == case_id
+        ]
+    return out
+
+
+RPCS = {
+    "match_constitution_articles": _rpc_match_articles,
+    "get_case_history": _rpc_case_history
+}
+
+
+# ------------------------------
+# Jina embeddings
+# ------------------------------
+def make_jina_handler(behaviour: Behaviour):
+
+    class Handler(_Handler):
+
+        def do_POST(self):
+            if self._maybe_fail():
+                return
+            body = self._body() or {}
+            inputs = body.get("input")
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            self._send(200, {
+                "model": body.get("model"),
+                "data": [
+                    {"index": i, "embedding": fake_embedding(t)}
+                    for i, t in enumerate(inputs)
+                ]
+            })
+
+    Handler.behaviour = behaviour
+    return Handler
+
+
+# ------------------------------
+# Gemini generateContent (REST)
+# ------------------------------
+def fake_completion(prompt: str) -> str:
+    if "legal maintainability check" in prompt:
+        return "CIVIL MAINTAINABLE"
+    if "constitutional screening" in prompt:
+        return "NO CONSTITUTIONAL ISSUE"
+    if "Extract ONLY facts" in prompt:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"- Document {digest} records the events described."
+    return "INCONCLUSIVE"
+
+
+def make_gemini_handler(behaviour: Behaviour):
+
+    class Handler(_Handler):
+
+        def do_POST(self):
+            if self._maybe_fail():
+                return
+            body = self._body() or {}
+            prompt = "".join(
+                p.get("text", "")
+                for c in body.get("contents", [])
+                for p in c.get("parts", [])
+            )
+            self._send(200, {
+                "candidates": [{
+                    "content": {
+                        "role": "model",
+                        "parts": [{"text": fake_completion(prompt)}]
+                    },
+                    "finishReason": "STOP",
+                    "index": 0
+                }]
+            })
+
+    Handler.behaviour = behaviour
+    return Handler
+
+
+# ------------------------------
+# Lifecycle
+# ------------------------------
+def serve(handler) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def url_of(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
@@ -0,0 +1,123 @@
+"""
+Recall@k and latency of constitution retrieval: vector, BM25, hybrid.
+
+Runs in-process against the configured Supabase / embedding backend
+(same environment as the API). Queries are generated from the corpus
+itself, each labelled with the article it came from:
+
+  - reference: an incident sentence naming "Article N"
+  - wording:   a verbatim span of the article's text
+  - title:     the article's title words, without the number
+
+    python benchmarks/retrieval.py --k 5 --queries 200
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import retrieval  # noqa: E402
+from embeddings import embed_many  # noqa: E402
+
+SPAN_WORDS = 12
+
+
+def make_queries(rows, n: int, rng) -> list:
+    """
+    [(kind, query, expected article id)]
+    """
+    queries = []
+    for r in rng.sample(rows, min(n, len(rows))):
+        title, text = r["article_title"] or "", r["article_text"] or ""
+        number = re.match(r"\s*Article\s+(\d+[A-Z]?)", title)
+        if number:
+            queries.append((
+                "reference",
+                f"The petitioner says the authorities violated Article "
+                f"{number.group(1)} when they acted without a hearing.",
+                r["id"]
+            ))
+        words = text.split()
+        if len(words) > SPAN_WORDS:
+            start = rng.randrange(len(words) - SPAN_WORDS)
+            queries.append((
+                "wording", " ".join(words[start:start + SPAN_WORDS]), r["id"]
+            ))
+        name = re.sub(r"^\s*Article\s+\d+[A-Z]?\s*[–-]?\s*", "", title)
+        if name.strip():
+            queries.append(("title", name, r["id"]))
+    return queries
+
+
+def percentile(values, q):
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, round(q * len(s)) - 1))] if s else None
+
+
+def evaluate(index, queries, k: int) -> dict:
+    rows, lexical = index.snapshot.rows, index.snapshot.lexical
+
+    def vector(q):
+        return [r["id"] for r in index.search_vector(retrieval.embed(q), k)]
+
+    def bm25(q):
+        return [rows[i]["id"] for i, _ in lexical.search(q, k)]
+
+    def hybrid(q):
+        return [r["id"] for r in index.search_hybrid(q, k)]
+
+    report = {}
+    for name, rank in (("vector", vector), ("bm25", bm25),
+                       ("hybrid", hybrid)):
+        hits, by_kind, latencies = 0, {}, []
+        for kind, q, expected in queries:
+            start = time.perf_counter()
+            found = expected in rank(q)
+            latencies.append(time.perf_counter() - start)
+            hits += found
+            seen, total = by_kind.get(kind, (0, 0))
+            by_kind[kind] = (seen + found, total + 1)
+        report[name] = {
+            "recall": round(hits / len(queries), 3),
+            "by_kind": {
+                kind: round(seen / total, 3)
+                for kind, (seen, total) in sorted(by_kind.items())
+            },
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2)
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    index = retrieval.ConstitutionIndex()
+    index.refresh(force=True)
+    if index.snapshot is None:
+        raise RuntimeError("❌ Could not load constitution_articles")
+
+    rows = index.snapshot.rows
+    queries = make_queries(rows, args.queries, random.Random(args.seed))
+
+    # Embed up front: latencies below measure ranking, not the backend
+    embed_many([q for _, q, _ in queries])
+
+    print(f"\n📚 {len(rows)} articles, {len(queries)} queries, k={args.k}")
+    for name, r in evaluate(index, queries, args.k).items():
+        kinds = "  ".join(f"{k}={v:.3f}" for k, v in r["by_kind"].items())
+        print(f"  {name:<7} recall@{args.k} {r['recall']:.3f}  ({kinds})  "
+              f"p50 {r['p50_ms']:.2f}ms  p95 {r['p95_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
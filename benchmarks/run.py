@@ -0,0 +1,390 @@
+"""
+Offline benchmark for the LEXI API.
+
+Starts local stand-ins for Supabase, Jina and Gemini (benchmarks/fakes.py),
+boots the real FastAPI app under uvicorn against them, drives the main
+endpoints and reports p50/p95/p99 latency and requests/second.
+
+    python benchmarks/run.py --requests 200 --concurrency 8
+    python benchmarks/run.py --save baseline
+    python benchmarks/run.py --compare baseline --threshold 0.15
+
+Service behaviour is configurable, e.g.
+    --latency supabase=0.03,jina=0.1,gemini=0.5 --errors gemini=0.05
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import fakes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+SCENARIOS = ["screen", "screen_batch", "upload", "history", "verdict"]
+SCREEN_BATCH = 20
+
+INCIDENTS = [
+    "The landlord locked the tenant out without notice and kept the deposit.",
+    "A police officer detained the petitioner for two days without charge.",
+    "The employer withheld three months of salary after a contract dispute.",
+    "A neighbour built a wall across a shared access road.",
+    "The municipality demolished a shop without a hearing.",
+    "A journalist was barred from publishing a report on local elections.",
+    "The school refused admission to a child on the basis of caste.",
+    "A buyer paid in full but the seller never delivered the vehicle."
+]
+
+
+# ------------------------------
+# Setup
+# ------------------------------
+def parse_pairs(spec: str) -> dict:
+    out = {}
+    for item in filter(None, (spec or "").split(",")):
+        key, _, value = item.partition("=")
+        out[key.strip()] = float(value)
+    return out
+
+
+def seed(store, cases: int, articles: int):
+    rng = random.Random(7)
+    store.insert("constitution_articles", [
+        {
+            "article_title": f"Article {i} – Provision {i}",
+            "article_text": f"Text of Article {i}. " * 40,
+            "embedding": fakes.fake_embedding(f"Text of Article {i}. " * 40)
+        }
+        for i in range(1, articles + 1)
+    ])
+
+    for case in range(1, cases + 1):
+        desc = rng.choice(INCIDENTS)
+        store.insert("incidents", [{
+            "id": case, "title": f"Case {case}", "description": desc
+        }])
+        store.insert("claims", [
+            {
+                "case_id": case, "side": side, "text": f"Claim {n} {desc}",
+                "embedding": fakes.fake_embedding(f"claim {case} {n}")
+            }
+            for n, side in enumerate("ABABA")
+        ])
+        store.insert("evidence", [
+            {
+                "case_id": case, "side": "A", "file_name": f"exhibit{n}.pdf",
+                "hash": f"{case:04d}{n:060d}",
+                "extracted_text": f"Exhibit {n}. {desc} " * 200
+            }
+            for n in range(3)
+        ])
+        store.insert("facts", [
+            {
+                "case_id": case, "facts": f"- Fact {n} of case {case}",
+                "embedding": fakes.fake_embedding(f"fact {case} {n}")
+            }
+            for n in range(3)
+        ])
+
+
+def start_fakes(args):
+    latency = {"supabase": 0.02, "jina": 0.08, "gemini": 0.3}
+    latency.update(parse_pairs(args.latency))
+    errors = parse_pairs(args.errors)
+
+    store = fakes.PostgrestStore()
+    seed(store, args.cases, args.articles)
+
+    def behaviour(name):
+        return fakes.Behaviour(latency.get(name, 0.0),
+                               error_rate=errors.get(name, 0.0))
+
+    servers = {
+        "supabase": fakes.serve(fakes.make_postgrest_handler(
+            store, behaviour("supabase"), fakes.RPCS
+        )),
+        "jina": fakes.serve(fakes.make_jina_handler(behaviour("jina"))),
+        "gemini": fakes.serve(fakes.make_gemini_handler(behaviour("gemini")))
+    }
+    return servers, {"latency": latency, "errors": errors}
+
+
+def start_app(servers, port: int, workdir: str, extra_env: dict):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": ROOT,
+        "SUPABASE_URL": fakes.url_of(servers["supabase"]),
+        "SUPABASE_KEY": "bench.bench.bench",
+        "JINA_API_KEY": "bench",
+        "JINA_API_URL": fakes.url_of(servers["jina"]) + "/v1/embeddings",
+        "GEMINI_API_KEY": "bench",
+        "GEMINI_API_ENDPOINT": fakes.url_of(servers["gemini"]),
+        "LEXI_CACHE_DIR": os.path.join(workdir, "cache")
+    })
+    env.update(extra_env)
+
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("API process exited during startup")
+        try:
+            if requests.get(f"{base}/metrics", timeout=1).ok:
+                return proc, base, time.perf_counter() - started
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("API did not become ready within 60s")
+
+
+# ------------------------------
+# Load generation
+# ------------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    i = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+
+def summarise(latencies, errors, wall):
+    s = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rps": round((len(latencies) + errors) / wall, 2) if wall else None,
+        "p50_ms": round(percentile(s, 0.50) * 1000, 1) if s else None,
+        "p95_ms": round(percentile(s, 0.95) * 1000, 1) if s else None,
+        "p99_ms": round(percentile(s, 0.99) * 1000, 1) if s else None
+    }
+
+
+def drive(n, concurrency, request_fn):
+    """
+    Runs request_fn(i) n times on `concurrency` threads.
+    Returns (latencies, error count, wall seconds, responses).
+    """
+    def one(i):
+        start = time.perf_counter()
+        try:
+            res = request_fn(i)
+            ok = res.status_code < 400
+        except requests.RequestException:
+            res, ok = None, False
+        return time.perf_counter() - start, ok, res
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(n)))
+    wall = time.perf_counter() - started
+
+    latencies = [t for t, ok, _ in results if ok]
+    errors = sum(1 for _, ok, _ in results if not ok)
+    return latencies, errors, wall, [r for _, ok, r in results if ok]
+
+
+def evidence_files():
+    files = sorted(glob.glob(os.path.join(ROOT, "uploads", "*.pdf")))
+    files.append(os.path.join(ROOT, "data", "constitution.pdf"))
+    return [f for f in files if os.path.exists(f)]
+
+
+def run_scenarios(base, args):
+    session = requests.Session()
+    cases = args.cases
+    results = {}
+
+    if "screen" in args.scenarios:
+        results["screen"] = summarise(*drive(
+            args.requests, args.concurrency,
+            lambda i: session.post(
+                f"{base}/screen-incident",
+                params={"incident": INCIDENTS[i % len(INCIDENTS)]}
+            )
+        )[:3])
+
+    if "screen_batch" in args.scenarios:
+        # One request per SCREEN_BATCH incidents, timed to the last line
+        def screen_batch(i):
+            res = session.post(f"{base}/screen-incidents", json=[
+                INCIDENTS[(i + j) % len(INCIDENTS)]
+                for j in range(SCREEN_BATCH)
+            ])
+            res.content  # drain the NDJSON stream
+            return res
+
+        results["screen_batch"] = summarise(*drive(
+            max(1, args.requests // SCREEN_BATCH), args.concurrency,
+            screen_batch
+        )[:3])
+
+    if "upload" in args.scenarios:
+        files = evidence_files()
+
+        def upload(i):
+            path = files[i % len(files)]
+            with open(path, "rb") as f:
+                return session.post(
+                    f"{base}/evidence/upload",
+                    data={"case_id": str(i % cases + 1), "side": "A"},
+                    files={"file": (os.path.basename(path), f,
+                                    "application/pdf")}
+                )
+
+        latencies, errors, wall, responses = drive(
+            args.uploads, args.concurrency, upload
+        )
+        results["upload"] = summarise(latencies, errors, wall)
+        results["ingest"] = wait_for_jobs(
+            base, session, [r.json()["job_id"] for r in responses]
+        )
+
+    if "history" in args.scenarios:
+        results["history"] = summarise(*drive(
+            args.requests, args.concurrency,
+            lambda i: session.get(f"{base}/case/{i % cases + 1}/history")
+        )[:3])
+
+    if "verdict" in args.scenarios:
+        results["verdict"] = summarise(*drive(
+            args.requests, args.concurrency,
+            lambda i: session.get(
+                f"{base}/verdict-with-reason",
+                params={"case_id": i % cases + 1, "score": 0.6,
+                        "case_type": "civil"}
+            )
+        )[:3])
+
+    return results
+
+
+def wait_for_jobs(base, session, job_ids, timeout=600):
+    """
+    End-to-end ingestion latency, taken from each job's own timings.
+    """
+    pending, totals, failed = set(job_ids), [], 0
+    started = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        for job_id in list(pending):
+            job = session.get(f"{base}/evidence/jobs/{job_id}").json()
+            if job["status"] in ("done", "failed"):
+                pending.discard(job_id)
+                if job["status"] == "done":
+                    totals.append(job["total_ms"] / 1000)
+                else:
+                    failed += 1
+        time.sleep(0.2)
+    wall = time.perf_counter() - started
+    return summarise(totals, failed + len(pending), wall)
+
+
+# ------------------------------
+# Baselines
+# ------------------------------
+def save_baseline(name, report):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Baseline saved to {path}")
+
+
+def compare(name, report, threshold) -> bool:
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    with open(path, encoding="utf-8") as f:
+        base = json.load(f)
+
+    regressed = False
+    print(f"\n📊 Compared with baseline '{name}' (threshold {threshold:.0%})")
+    for scenario, now in report["scenarios"].items():
+        then = base["scenarios"].get(scenario)
+        if not then:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            a, b = then.get(metric), now.get(metric)
+            if not a or b is None:
+                continue
+            delta = (b - a) / a
+            worse = delta < -threshold if metric == "rps" \
+                else delta > threshold
+            regressed |= worse
+            flag = "❌" if worse else "  "
+            print(f"{flag} {scenario:8} {metric:7} {a:>10} -> {b:>10} "
+                  f"({delta:+.1%})")
+    return not regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--uploads", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cases", type=int, default=10)
+    parser.add_argument("--articles", type=int, default=400)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--latency", default="")
+    parser.add_argument("--errors", default="")
+    parser.add_argument("--env", action="append", default=[],
+                        help="extra KEY=VALUE for the API process")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--save")
+    parser.add_argument("--compare")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    args.scenarios = args.scenarios.split(",")
+
+    servers, behaviour = start_fakes(args)
+    extra_env = dict(e.split("=", 1) for e in args.env)
+
+    with tempfile.TemporaryDirectory(prefix="lexi-bench-") as workdir:
+        proc, base, startup = start_app(servers, args.port, workdir, extra_env)
+        try:
+            scenarios = run_scenarios(base, args)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = {
+        "meta": {
+            "requests": args.requests,
+            "uploads": args.uploads,
+            "concurrency": args.concurrency,
+            "env": extra_env,
+            **behaviour,
+            "startup_s": round(startup, 3)
+        },
+        "scenarios": scenarios
+    }
+
+    print(f"\n🚀 API ready in {startup:.2f}s")
+    print(f"{'scenario':10}{'reqs':>6}{'err':>5}{'rps':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in scenarios.items():
+        print(f"{name:10}{r['requests']:>6}{r['errors']:>5}"
+              f"{str(r['rps']):>9}{str(r['p50_ms']):>10}"
+              f"{str(r['p95_ms']):>10}{str(r['p99_ms']):>10}")
+
+    if args.save:
+        save_baseline(args.save, report)
+    if args.compare and not compare(args.compare, report, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
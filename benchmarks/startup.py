@@ -0,0 +1,110 @@
+"""
+Import-time report for the LEXI API.
+
+Imports a module (default `main`) in fresh interpreters and reports the
+median wall time, plus the slowest imports from `python -X importtime`.
+No services or credentials are needed: providers connect on first use.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --module evidence --runs 10 --top 15
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_TIMER = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _env(workdir: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT
+    env["LEXI_CACHE_DIR"] = os.path.join(workdir, "cache")
+    return env
+
+
+def _run(args: list, workdir: str):
+    out = subprocess.run(
+        [sys.executable, *args], cwd=workdir, env=_env(workdir),
+        capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        tail = out.stderr.strip().splitlines()[-1:] or ["no output"]
+        raise RuntimeError(f"import failed: {tail[0]}")
+    return out
+
+
+def time_import(module: str, runs: int, workdir: str) -> list:
+    samples = []
+    for _ in range(runs):
+        out = _run(["-c", _TIMER.format(module=module)], workdir)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(module: str, top: int, workdir: str) -> list:
+    """
+    (cumulative seconds, package) for the top-level packages whose
+    import took longest.
+    """
+    out = _run(["-X", "importtime", "-c", f"import {module}"], workdir)
+
+    totals = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        if name.startswith("  "):
+            continue  # nested import, already in its parent's total
+        pkg = name.strip()
+        totals[pkg] = totals.get(pkg, 0) + int(cumulative) / 1e6
+
+    ranked = sorted(totals.items(), key=lambda kv: -kv[1])[:top]
+    return [(round(s, 4), name) for name, s in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="lexi-startup-") as workdir:
+        samples = time_import(args.module, max(1, args.runs), workdir)
+        slowest = slowest_imports(args.module, args.top, workdir)
+
+    report = {
+        "module": args.module,
+        "runs": len(samples),
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+        "slowest_imports": slowest
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n⏱  import {args.module}: median {report['median_s']:.3f}s "
+          f"(min {report['min_s']:.3f}s, max {report['max_s']:.3f}s, "
+          f"{report['runs']} runs)")
+    print("\nSlowest top-level imports (cumulative):")
+    for seconds, name in slowest:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import re
+import math
+import numpy as np
+
+# ======================================================
+# IN-PROCESS BM25 INDEX (constitution articles)
+# ======================================================
+# Inverted index over article_title + article_text. Each posting stores
+# its full BM25 term weight, so a query is one vectorized add per query
+# term. Explicit Article references ("Article 21", "Art. 19(1)(a)") are
+# answered from a number -> article map before any scoring.
+
+K1 = 1.2
+B = 0.75
+TITLE_BOOST = 2   # title terms count this many times
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or "
+    "shall that the their this to was were which with".split()
+)
+
+# "Article 21", "Article 21A", "Art. 19(1)(a)", "Articles 14 and 21"
+_ARTICLE_REF = re.compile(
+    r"\b(?:articles?|art\.)\s*"
+    r"((?:\d+[a-z]?(?![a-z])(?:\s*\(\w+\))*(?:\s*(?:,|and|&)\s*)?)+)",
+    re.I
+)
+_ARTICLE_NUMBER = re.compile(r"(\d+[a-z]?)(?![a-z])(?:\s*\(\w+\))*", re.I)
+# Titles produced by extract_constitution.extract_articles
+_ARTICLE_TITLE = re.compile(r"^\s*Article\s+(\d+[A-Z]?)", re.I)
+
+
+def tokenize(text: str) -> list:
+    return [
+        t for t in _TOKEN.findall((text or "").lower())
+        if t not in _STOPWORDS
+    ]
+
+
+def article_refs(text: str) -> list:
+    """
+    Article numbers named in `text`, in order of first mention.
+    """
+    seen = []
+    for m in _ARTICLE_REF.finditer(text or ""):
+        for number in _ARTICLE_NUMBER.findall(m.group(1)):
+            number = number.upper()
+            if number not in seen:
+                seen.append(number)
+    return seen
+
+
+class BM25Index:
+    """
+    Built once per corpus version from rows with article_title /
+    article_text; positions in `rows` are the document ids.
+    """
+
+    def __init__(self, rows: list):
+        self.size = len(rows)
+        self.by_number = {}
+        docs = []
+        for i, r in enumerate(rows):
+            title = r.get("article_title") or ""
+            m = _ARTICLE_TITLE.match(title)
+            if m:
+                self.by_number.setdefault(m.group(1).upper(), []).append(i)
+            docs.append(
+                tokenize(title) * TITLE_BOOST
+                + tokenize(r.get("article_text") or "")
+            )
+
+        lengths = np.array([len(d) for d in docs], dtype=np.float32)
+        avg = float(lengths.mean()) if self.size and lengths.mean() else 1.0
+
+        counts = {}  # term -> {doc: tf}
+        for i, doc in enumerate(docs):
+            for term in doc:
+                tf = counts.setdefault(term, {})
+                tf[i] = tf.get(i, 0) + 1
+
+        self.postings = {}
+        for term, tf in counts.items():
+            ids = np.fromiter(tf.keys(), dtype=np.int32, count=len(tf))
+            freqs = np.fromiter(tf.values(), dtype=np.float32, count=len(tf))
+            idf = math.log(1 + (self.size - len(tf) + 0.5) / (len(tf) + 0.5))
+            norm = K1 * (1 - B + B * lengths[ids] / avg)
+            self.postings[term] = (ids, idf * freqs * (K1 + 1) / (freqs + norm))
+
+    def exact(self, query: str) -> list:
+        """
+        Documents for the Article numbers named in `query`.
+        """
+        return [
+            i for number in article_refs(query)
+            for i in self.by_number.get(number, [])
+        ]
+
+    def search(self, query: str, top_k: int = 5) -> list:
+        """
+        [(doc id, score)] by descending BM25 score; zero scores omitted.
+        """
+        if not self.size:
+            return []
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        k = min(top_k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
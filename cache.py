@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# ------------------------------
+# Storage
+# ------------------------------
+CACHE_DIR = os.getenv("LEXI_CACHE_DIR", "cache")
+
+
+# ------------------------------
+# In-memory LRU
+# ------------------------------
+class LRUCache:
+    """
+    Bounded, thread-safe least-recently-used map.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ------------------------------
+# Per-process SQLite connection
+# ------------------------------
+_open_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    global _open_lock
+    _open_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class SQLiteBacked:
+    """
+    Opens its SQLite connection (and lock) on first use, once per
+    process: importing is free, and an instance created before a
+    fork reconnects in the child instead of sharing the parent's handle.
+    """
+
+    def _setup(self, path: str, schema: list, timeout: float = 5.0):
+        self.path = path
+        self._schema = schema
+        self._timeout = timeout
+        self._pid = None
+
+    def _ensure_open(self):
+        if self._pid == os.getpid():
+            return
+        with _open_lock:
+            if self._pid == os.getpid():
+                return
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, timeout=self._timeout
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self._schema:
+                conn.execute(statement)
+            self._migrate(conn)
+            conn.commit()
+            self._db = (conn, threading.Lock())
+            self._pid = os.getpid()
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """
+        Hook for upgrading files created by older versions.
+        """
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        self._ensure_open()
+        return self._db[0]
+
+    @property
+    def _lock(self) -> threading.Lock:
+        self._ensure_open()
+        return self._db[1]
+
+
+# ------------------------------
+# On-disk key/value store
+# ------------------------------
+class SQLiteStore(SQLiteBacked):
+    """
+    Persistent JSON key/value table in a local SQLite file.
+    Survives restarts; safe to share across threads and forks.
+    """
+
+    def __init__(self, name: str, table: str = "kv"):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.table = table
+        self._setup(os.path.join(CACHE_DIR, f"{name}.sqlite"), [
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        ])
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            # stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table} "
+                    f"WHERE key IN ({marks})",
+                    chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) "
+                "VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in items.items()]
+            )
+            self._conn.commit()
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def update(self, key, fn):
+        """
+        Atomically stores fn(current value or None) under `key` and
+        returns it; serialized across threads and processes. A None
+        result leaves the key untouched.
+        """
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                row = cur.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                value = fn(json.loads(row[0]) if row else None)
+                if value is not None:
+                    cur.execute(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value) "
+                        "VALUES (?, ?)",
+                        (key, json.dumps(value))
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return value
+
+
+# ------------------------------
+# Two-tier cache (LRU over SQLite)
+# ------------------------------
+class TieredCache:
+    """
+    Memory LRU in front of a persistent store (an unbounded
+    SQLiteStore unless `disk` is given, e.g. an ExpiringStore), with
+    hit/miss counters.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, disk=None):
+        self.memory = LRUCache(maxsize)
+        self.disk = disk if disk is not None else SQLiteStore(name)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, **amounts):
+        with self._stats_lock:
+            for key, n in amounts.items():
+                self.stats[key] += n
+
+    def stats_snapshot(self) -> dict:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def get_many(self, keys):
+        found, missing = {}, []
+        for key in keys:
+            value = self.memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count(memory_hits=len(found))
+
+        if missing:
+            from_disk = self.disk.get_many(missing)
+            for key, value in from_disk.items():
+                self.memory.put(key, value)
+            found.update(from_disk)
+            self._count(
+                disk_hits=len(from_disk),
+                misses=len(missing) - len(from_disk)
+            )
+
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def put_many(self, items: dict):
+        for key, value in items.items():
+            self.memory.put(key, value)
+        self.disk.put_many(items)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+
+# ------------------------------
+# On-disk store with TTL and size bound
+# ------------------------------
+class ExpiringStore(SQLiteBacked):
+    """
+    Persistent JSON key/value table whose entries expire after `ttl`
+    seconds; beyond `max_entries` the least recently read are evicted.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._setup(os.path.join(CACHE_DIR, f"{name}.sqlite"), [
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS entries_accessed "
+            "ON entries (accessed_at)"
+        ])
+
+    def get_many(self, keys):
+        now = time.time()
+        found, expired = {}, []
+        keys = list(keys)
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT key, value, created_at FROM entries "
+                    f"WHERE key IN ({marks})",
+                    chunk
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if now - created_at > self.ttl:
+                        expired.append((key,))
+                    else:
+                        found[key] = value
+            if not found and not expired:
+                return {}
+            self._conn.executemany(
+                "DELETE FROM entries WHERE key = ?", expired
+            )
+            self._conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                [(now, key) for key in found]
+            )
+            self._conn.commit()
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries "
+                "(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(k, json.dumps(v), now, now) for k, v in items.items()]
+            )
+            self._conn.execute(
+                "DELETE FROM entries WHERE created_at < ?",
+                (now - self.ttl,)
+            )
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY accessed_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def put(self, key, value):
+        self.put_many({key: value})
@@ -0,0 +1,95 @@
+import os
+import hashlib
+
+from cache import LRUCache
+from db import table_signatures
+
+# ======================================================
+# DATA-DERIVED CASE-HISTORY CACHE
+# ======================================================
+# The version of a case is read from Supabase itself: (row count, max
+# id) of the incident and of its claims, evidence and facts. Every
+# instance sees the same version with no shared local state, and
+# nothing is written for cases that do not exist. Rendered histories
+# are cached per process under that version.
+#
+# The signature cannot see in-place UPDATEs, which only touch heavy
+# columns (reembed rewrites claim / fact embeddings), so `full`
+# histories are never cached or tagged.
+CASE_CACHE_SIZE = int(os.getenv("CASE_CACHE_SIZE", "256"))
+
+_entries = LRUCache(CASE_CACHE_SIZE)
+_UNSET = object()  # `v` not supplied (None means "unreadable")
+
+# section -> (table, column holding the case id)
+_SOURCES = {
+    "incident": ("incidents", "id"),
+    "claims": ("claims", "case_id"),
+    "evidence": ("evidence", "case_id"),
+    "facts": ("facts", "case_id")
+}
+
+
+def version(case_id: int):
+    """
+    Short digest of the case's table signatures; None if any could
+    not be read (callers then skip caching).
+    """
+    signatures = table_signatures({
+        section: (table, {column: case_id})
+        for section, (table, column) in _SOURCES.items()
+    })
+    if any(s is None for s in signatures.values()):
+        return None
+    raw = repr(sorted(signatures.items())).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def etag(case_id: int, full: bool = False, v=_UNSET) -> str:
+    if full:
+        return None
+    if v is _UNSET:
+        v = version(case_id)
+    return f'W/"{case_id}-{v}"' if v else None
+
+
+def matches(if_none_match: str, tag: str) -> bool:
+    """
+    If-None-Match evaluation (RFC 9110 13.1.2): "*" or any listed tag
+    equal to `tag` under weak comparison.
+    """
+    if not if_none_match or not tag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag[2:] if tag.startswith("W/") else tag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def get_history(case_id: int, full: bool, loader, v=_UNSET):
+    """
+    Returns (etag, history), calling `loader()` only when the case
+    changed since the cached copy was built.
+    """
+    if full:
+        return None, loader()
+    if v is _UNSET:
+        v = version(case_id)
+    if v is None:
+        return None, loader()
+
+    key = case_id
+    entry = _entries.get(key)
+    if entry is None or entry[0] != v:
+        # Stored under the version read *before* loading, so a write
+        # that lands mid-load forces a reload on the next request
+        entry = (v, loader())
+        _entries.put(key, entry)
+
+    return etag(case_id, False, entry[0]), entry[1]
@@ -0,0 +1,58 @@
+import re
+
+# ======================================================
+# TEXT CHUNKING (overlapping windows)
+# ======================================================
+
+
+def chunk_text(text: str, size: int = 12000, overlap: int = 800) -> list:
+    """
+    Splits text into windows of at most `size` characters, each sharing
+    `overlap` characters with the previous one so facts that straddle a
+    boundary appear whole in at least one chunk. Cuts prefer paragraph,
+    then line, then word boundaries.
+    """
+    text = text.strip()
+    if len(text) <= size:
+        return [text] if text else []
+
+    overlap = min(overlap, size // 2)
+    chunks, start = [], 0
+
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            window = text[start:end]
+            for sep in ("\n\n", "\n", " "):
+                cut = window.rfind(sep, size // 2)
+                if cut != -1:
+                    end = start + cut
+                    break
+
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+
+    return [c for c in chunks if c]
+
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+
+def split_bullets(text: str) -> list:
+    """
+    Bullet lines of an LLM answer, without their markers. Indented
+    lines continue the bullet above; any other line (a preamble such
+    as "Here are the facts:", a closing remark) is dropped.
+    """
+    items = []
+    for line in text.splitlines():
+        bullet = _BULLET.match(line)
+        if bullet:
+            item = line[bullet.end():].strip()
+            if item:
+                items.append(item)
+        elif items and line[:1].isspace() and line.strip():
+            items[-1] += " " + line.strip()
+    return items
@@ -1,79 +1,387 @@
 import os
-import time
-import httpx
-from supabase import create_client
-from postgrest.exceptions import APIError
+import json
+from concurrent.futures import ThreadPoolExecutor
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+import metrics
+import providers
+import resilience
+from resilience import TransientError, CircuitOpen
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise RuntimeError("SUPABASE_URL / SUPABASE_KEY missing")
 
 # --------------------------------------------------
-# SINGLETON CLIENT (NO ClientOptions!)
+# PER-PROCESS CLIENT (NO ClientOptions!)
 # --------------------------------------------------
-_client = None
+def _create_client():
+    # Imported on first use: supabase pulls in a large dependency tree
+    from supabase import create_client
+
+    url, key = providers.require_env("SUPABASE_URL", "SUPABASE_KEY")
+    return create_client(url, key)
+
+
+providers.register("supabase", _create_client)
 
 
 def get_client():
-    global _client
-    if _client is None:
-        _client = create_client(
-            SUPABASE_URL,
-            SUPABASE_KEY
-        )
-    return _client
+    return providers.get("supabase")
 
 
 # --------------------------------------------------
-# SAFE FETCH
+# RESILIENT EXECUTION (shared retry / rate limit / breaker)
 # --------------------------------------------------
-def fetch(table: str, filters: dict = None, retries: int = 3):
-    for attempt in range(retries):
+def _api_errors():
+    import httpx
+    from postgrest.exceptions import APIError
+    return APIError, httpx.HTTPError
+
+
+def db_errors():
+    return _api_errors() + (TransientError, CircuitOpen)
+
+
+# SQLSTATE classes that will fail identically on retry:
+# 22 data exception, 23 integrity violation, 42 syntax / undefined
+# object, plus PostgREST's own request errors
+_PERMANENT_CODES = ("22", "23", "42", "PGRST")
+
+
+def _is_transient(e) -> bool:
+    import httpx
+    from postgrest.exceptions import APIError
+
+    if isinstance(e, APIError):
+        return not str(e.code or "").startswith(_PERMANENT_CODES)
+    return isinstance(e, httpx.TransportError)
+
+
+def _call(fn, retries: int = None, op: str = None, table: str = None):
+    """
+    Runs `fn` through the Supabase provider; raises on final failure.
+    Timed as the `db_<op>` stage.
+    """
+    def attempt():
         try:
-            sb = get_client()
-            q = sb.table(table).select("*")
-            if filters:
-                for k, v in filters.items():
-                    q = q.eq(k, v)
-            return q.execute().data or []
-        except (APIError, httpx.ReadError):
-            if attempt == retries - 1:
-                return []
-            time.sleep(0.6)
+            return fn()
+        except _api_errors() as e:
+            if _is_transient(e):
+                raise TransientError(str(e)) from e
+            raise
+
+    with metrics.span(f"db_{op}", provider="supabase", table=table):
+        return resilience.get("supabase").call(attempt, retries=retries)
+
+
+def _safe(fn, default, retries: int = None, op: str = None, table: str = None):
+    """
+    Like _call, but returns `default` instead of raising.
+    """
+    try:
+        return _call(fn, retries, op, table)
+    except db_errors():
+        return default
+
+
+# --------------------------------------------------
+# SAFE FETCH
+# --------------------------------------------------
+def fetch(
+    table: str,
+    filters: dict = None,
+    columns: list = None,
+    retries: int = None
+):
+    """
+    `columns` projects the select (default: every column).
+    """
+    def run():
+        sb = get_client()
+        q = sb.table(table).select(",".join(columns) if columns else "*")
+        if filters:
+            for k, v in filters.items():
+                q = q.eq(k, v)
+        return q.execute().data or []
+
+    return _safe(run, [], retries, "fetch", table)
+
+
+# --------------------------------------------------
+# KEYSET PAGE (ordered by id)
+# --------------------------------------------------
+def fetch_page(
+    table: str,
+    filters: dict = None,
+    columns: list = None,
+    after: int = None,
+    limit: int = 100,
+    retries: int = None,
+    strict: bool = False
+):
+    """
+    Up to `limit` rows with id > `after`, ordered by id. A failed read
+    returns [] unless `strict`, which raises so that callers can tell
+    failure from the end of the table.
+    """
+    def run():
+        sb = get_client()
+        q = sb.table(table).select(",".join(columns) if columns else "*")
+        if filters:
+            for k, v in filters.items():
+                q = q.eq(k, v)
+        if after is not None:
+            q = q.gt("id", after)
+        return q.order("id").limit(limit).execute().data or []
+
+    if strict:
+        return _call(run, retries, "fetch_page", table)
+    return _safe(run, [], retries, "fetch_page", table)
+
+
+# --------------------------------------------------
+# COUNT ONLY (no rows transferred)
+# --------------------------------------------------
+def count(table: str, filters: dict = None, retries: int = None) -> int:
+    def run():
+        sb = get_client()
+        q = sb.table(table).select("id", count="exact", head=True)
+        if filters:
+            for k, v in filters.items():
+                q = q.eq(k, v)
+        return q.execute().count or 0
+
+    return _safe(run, 0, retries, "count", table)
 
 
 # --------------------------------------------------
 # SAFE INSERT
 # --------------------------------------------------
-def insert(table: str, data: dict, retries: int = 3):
-    for attempt in range(retries):
+def insert(table: str, data: dict, retries: int = None):
+    def run():
+        sb = get_client()
+        return sb.table(table).insert(data).execute().data or []
+
+    return _safe(run, [], retries, "insert", table)
+
+
+# --------------------------------------------------
+# CONCURRENT READS (independent tables in parallel)
+# --------------------------------------------------
+DB_READ_WORKERS = int(os.getenv("DB_READ_WORKERS", "8"))
+
+providers.register("db_read_pool", lambda: ThreadPoolExecutor(
+    max_workers=DB_READ_WORKERS,
+    thread_name_prefix="db-read"
+))
+
+
+def fetch_concurrent(queries: dict):
+    """
+    Runs independent fetches in parallel.
+    `queries` maps name -> (table, filters, columns); returns
+    name -> rows, so latency is that of the slowest query.
+    """
+    pool = providers.get("db_read_pool")
+    futures = {
+        name: pool.submit(fetch, table, filters, columns)
+        for name, (table, filters, columns) in queries.items()
+    }
+    return {name: fut.result() for name, fut in futures.items()}
+
+
+# --------------------------------------------------
+# SAFE RPC
+# --------------------------------------------------
+def rpc(fn: str, params: dict, retries: int = None):
+    """
+    Calls a Postgres function; returns its data, or None on failure.
+    """
+    return _safe(
+        lambda: get_client().rpc(fn, params).execute().data,
+        None, retries, "rpc", fn
+    )
+
+
+# --------------------------------------------------
+# BULK INSERT / UPSERT (per-row results)
+# --------------------------------------------------
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "100"))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(2 * 1024 * 1024)))
+
+
+def _chunks(rows, max_rows, max_bytes):
+    """
+    Splits rows into chunks bounded by row count and encoded size.
+    """
+    chunk, size = [], 0
+    for row in rows:
+        row_size = len(json.dumps(row, default=str))
+        if chunk and (len(chunk) >= max_rows or size + row_size > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        yield chunk
+
+
+def _write_chunk(table, chunk, retries, on_conflict):
+    """
+    Writes one chunk; on final failure bisects it so a single bad row
+    does not fail its neighbours. Returns per-row result dicts.
+    """
+    def run():
+        q = get_client().table(table)
+        if on_conflict is None:
+            q = q.insert(chunk)
+        else:
+            q = q.upsert(chunk, on_conflict=on_conflict)
+        return q.execute().data or []
+
+    try:
+        op = "insert_many" if on_conflict is None else "upsert_many"
+        data = _call(run, retries, op, table)
+    except CircuitOpen as e:
+        return [{"ok": False, "data": None, "error": str(e)} for _ in chunk]
+    except db_errors() as e:
+        error = str(e)
+    else:
+        if len(data) == len(chunk):
+            return [{"ok": True, "data": r, "error": None} for r in data]
+        return [{"ok": True, "data": None, "error": None} for _ in chunk]
+
+    if len(chunk) > 1:
+        mid = len(chunk) // 2
+        return (
+            _write_chunk(table, chunk[:mid], 1, on_conflict)
+            + _write_chunk(table, chunk[mid:], 1, on_conflict)
+        )
+    return [{"ok": False, "data": None, "error": error}]
+
+
+def _write_many(table, rows, on_conflict, retries, max_rows):
+    results = []
+    for chunk in _chunks(rows, max(1, max_rows), BULK_MAX_BYTES):
+        results.extend(_write_chunk(table, chunk, retries, on_conflict))
+    return results
+
+
+def insert_many(
+    table: str,
+    rows: list,
+    retries: int = None,
+    max_rows: int = BULK_MAX_ROWS
+):
+    """
+    Inserts rows in size-bounded bulk requests.
+    Returns one {"ok", "data", "error"} dict per input row, in order.
+    """
+    return _write_many(table, rows, None, retries, max_rows)
+
+
+def upsert_many(
+    table: str,
+    rows: list,
+    on_conflict: str = "id",
+    retries: int = None,
+    max_rows: int = BULK_MAX_ROWS
+):
+    """
+    Upserts rows (conflict target `on_conflict`) in size-bounded bulk
+    requests. Returns one {"ok", "data", "error"} dict per input row.
+    """
+    return _write_many(table, rows, on_conflict, retries, max_rows)
+
+
+# --------------------------------------------------
+# PER-ROW UPDATE (only the given columns change)
+# --------------------------------------------------
+def update_many(table: str, rows: list, key: str = "id", retries: int = None):
+    """
+    Sets each row's other columns where `key` matches, one request per
+    row. Unlike upsert_many, columns absent from the row are left as
+    they are and rows that no longer exist are not recreated.
+    Returns one {"ok", "data", "error"} dict per input row.
+    """
+    results = []
+    for row in rows:
+        values = {k: v for k, v in row.items() if k != key}
+
+        def run(values=values, match=row[key]):
+            q = get_client().table(table).update(values).eq(key, match)
+            return q.execute().data or []
+
         try:
-            sb = get_client()
-            return sb.table(table).insert(data).execute().data or []
-        except (APIError, httpx.ReadError):
-            if attempt == retries - 1:
-                return []
-            time.sleep(0.6)
+            data = _call(run, retries, "update_many", table)
+        except db_errors() as e:
+            results.append({"ok": False, "data": None, "error": str(e)})
+        else:
+            results.append({
+                "ok": True, "data": data[0] if data else None, "error": None
+            })
+    return results
+
+
+# --------------------------------------------------
+# SAFE DELETE (list values match with IN)
+# --------------------------------------------------
+def delete(table: str, filters: dict, retries: int = None):
+    def run():
+        sb = get_client()
+        q = sb.table(table).delete()
+        for k, v in filters.items():
+            q = q.in_(k, v) if isinstance(v, (list, tuple)) else q.eq(k, v)
+        return q.execute().data or []
+
+    return _safe(run, [], retries, "delete", table)
 
 
 # --------------------------------------------------
 # SAFE VECTOR SEARCH (RPC)
 # --------------------------------------------------
 def fetch_similar_constitution_articles(text: str, top_k: int = 5):
-    for attempt in range(3):
-        try:
-            sb = get_client()
-            res = sb.rpc(
-                "match_constitution_articles",
-                {
-                    "query_text": text,
-                    "match_count": top_k
-                }
-            ).execute()
-            return res.data or []
-        except (APIError, httpx.ReadError):
-            if attempt == 2:
-                return []
-            time.sleep(0.6)
+    def run():
+        sb = get_client()
+        res = sb.rpc(
+            "match_constitution_articles",
+            {
+                "query_text": text,
+                "match_count": top_k
+            }
+        ).execute()
+        return res.data or []
+
+    return _safe(run, [], 3, "rpc", "match_constitution_articles")
+
+
+# --------------------------------------------------
+# TABLE SIGNATURE (row count + newest id)
+# --------------------------------------------------
+def table_signature(table: str, filters: dict = None, retries: int = None):
+    """
+    Cheap change detector: one request returning (count, max id) of
+    the rows matching `filters`. Returns None if the table could not
+    be read.
+    """
+    def run():
+        sb = get_client()
+        q = sb.table(table).select("id", count="exact")
+        if filters:
+            for k, v in filters.items():
+                q = q.eq(k, v)
+        res = q.order("id", desc=True).limit(1).execute()
+        max_id = res.data[0]["id"] if res.data else None
+        return (res.count or 0, max_id)
+
+    return _safe(run, None, retries, "signature", table)
+
+
+def table_signatures(queries: dict):
+    """
+    table_signature for independent queries in parallel.
+    `queries` maps name -> (table, filters); returns name -> signature.
+    """
+    pool = providers.get("db_read_pool")
+    futures = {
+        name: pool.submit(table_signature, table, filters)
+        for name, (table, filters) in queries.items()
+    }
+    return {name: fut.result() for name, fut in futures.items()}
@@ -0,0 +1,202 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import providers
+import resilience
+from resilience import TransientError
+
+# ======================================================
+# EMBEDDING BACKENDS (selected by EMBED_BACKEND)
+# ======================================================
+# Every backend embeds one already size-bounded batch and must produce
+# vectors of EMBED_DIM, the width of the pgvector columns in
+# constitution_articles / facts / claims. Switching backends changes the
+# vector space: run `python reembed.py` to migrate stored rows.
+
+EMBED_DIM = int(os.getenv("EMBED_DIM", "768"))
+
+# ------------------------------
+# Jina (HTTPS)
+# ------------------------------
+JINA_MODEL = os.getenv("JINA_MODEL", "jina-embeddings-v2-base-en")
+JINA_URL = os.getenv("JINA_API_URL", "https://api.jina.ai/v1/embeddings")
+
+
+def _create_session():
+    # Pooled keep-alive connections, one session per process
+    (api_key,) = providers.require_env("JINA_API_KEY")
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    })
+    return session
+
+
+providers.register("jina", _create_session)
+
+
+class JinaBackend:
+    name = "jina"
+    model_id = JINA_MODEL
+
+    def embed_batch(self, inputs: list, retries: int = None) -> list:
+        return resilience.get("jina").call(
+            lambda: self._request(inputs),
+            retries=retries,
+            retry_on=(TransientError, requests.RequestException)
+        )
+
+    def _request(self, inputs):
+        response = providers.get("jina").post(
+            JINA_URL,
+            json={
+                "model": JINA_MODEL,
+                "input": inputs
+            },
+            timeout=60
+        )
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientError(
+                f"Jina HTTP {response.status_code}: {response.text[:200]}"
+            )
+
+        # A 4xx is a bad request; a malformed success body (truncated,
+        # proxy error page) is worth another attempt
+        error = RuntimeError if response.status_code >= 400 \
+            else TransientError
+
+        try:
+            payload = response.json()
+        except Exception:
+            raise error(f"Invalid response from Jina: {response.text[:200]}")
+
+        if not isinstance(payload, dict) or "data" not in payload:
+            raise error(f"Jina error: {str(payload)[:200]}")
+
+        # Jina echoes an "index" per item; never trust response order
+        data = sorted(payload["data"], key=lambda d: d.get("index", 0))
+        if len(data) != len(inputs):
+            raise RuntimeError(
+                f"Jina returned {len(data)} embeddings for {len(inputs)} inputs"
+            )
+
+        return [d["embedding"] for d in data]
+
+
+# ------------------------------
+# Local CPU (ONNX export + onnxruntime)
+# ------------------------------
+# Defaults to the ONNX export of the same Jina model, so stored vectors
+# stay comparable. The directory needs model.onnx and tokenizer.json.
+LOCAL_EMBED_MODEL = os.getenv("LOCAL_EMBED_MODEL", "jina-embeddings-v2-base-en")
+LOCAL_EMBED_MODEL_DIR = os.getenv(
+    "LOCAL_EMBED_MODEL_DIR", os.path.join("models", LOCAL_EMBED_MODEL)
+)
+LOCAL_EMBED_MAX_TOKENS = int(os.getenv("LOCAL_EMBED_MAX_TOKENS", "2048"))
+LOCAL_EMBED_BATCH = int(os.getenv("LOCAL_EMBED_BATCH", "16"))
+LOCAL_EMBED_WORKERS = int(os.getenv("LOCAL_EMBED_WORKERS", "2"))
+
+
+class LocalOnnxBackend:
+    """
+    Sentence embeddings on CPU: texts are tokenized, grouped by length
+    into micro-batches (less padding), run on a small thread pool
+    (onnxruntime releases the GIL), mean-pooled and L2-normalised.
+    """
+    name = "local"
+    model_id = f"local:{LOCAL_EMBED_MODEL}"
+
+    def __init__(self, model_dir: str = LOCAL_EMBED_MODEL_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, "model.onnx")
+        tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+        for path in (model_path, tokenizer_path):
+            if not os.path.exists(path):
+                raise RuntimeError(f"Local embedding model file missing: {path}")
+
+        # Split the cores between concurrent micro-batches
+        workers = max(1, LOCAL_EMBED_WORKERS)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // workers)
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=LOCAL_EMBED_MAX_TOKENS)
+
+        self.pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="embed-local"
+        )
+
+    def embed_batch(self, inputs: list, retries: int = None) -> list:
+        encodings = self.tokenizer.encode_batch(inputs)
+        order = sorted(range(len(inputs)), key=lambda i: len(encodings[i].ids))
+        step = max(1, LOCAL_EMBED_BATCH)
+        groups = [order[a:a + step] for a in range(0, len(order), step)]
+
+        results = [None] * len(inputs)
+        futures = [
+            (group, self.pool.submit(
+                self._run, [encodings[i] for i in group]
+            ))
+            for group in groups
+        ]
+        for group, fut in futures:
+            for i, vec in zip(group, fut.result()):
+                results[i] = vec
+        return results
+
+    def _run(self, encodings) -> list:
+        import numpy as np
+
+        width = max(len(e.ids) for e in encodings)
+        ids = np.zeros((len(encodings), width), dtype=np.int64)
+        mask = np.zeros_like(ids)
+        for row, e in enumerate(encodings):
+            ids[row, :len(e.ids)] = e.ids
+            mask[row, :len(e.ids)] = 1
+
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(ids)
+        feed = {k: v for k, v in feed.items() if k in self.input_names}
+
+        output = self.session.run(None, feed)[0]
+        if output.ndim == 3:  # token states -> masked mean
+            weights = mask[..., None].astype(np.float32)
+            summed = (output * weights).sum(axis=1)
+            output = summed / np.maximum(weights.sum(axis=1), 1e-9)
+
+        if output.shape[1] != EMBED_DIM:
+            raise RuntimeError(
+                f"Local model produces {output.shape[1]}-d vectors; "
+                f"the database stores {EMBED_DIM}-d"
+            )
+
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        output = output / np.maximum(norms, 1e-12)
+        return output.astype(np.float32).tolist()
+
+
+BACKENDS = {
+    JinaBackend.name: JinaBackend,
+    LocalOnnxBackend.name: LocalOnnxBackend
+}
+
+
+def backend_class(name: str):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown EMBED_BACKEND {name!r} "
+            f"(expected one of: {', '.join(BACKENDS)})"
+        ) from None
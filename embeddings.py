@@ -1,36 +1,112 @@
 import os
-import requests
+import hashlib
 
+import metrics
+import providers
+from cache import TieredCache, ExpiringStore
+from embedding_backends import backend_class
 
-JINA_API_KEY = os.getenv("JINA_API_KEY")
-JINA_MODEL = os.getenv("JINA_MODEL", "jina-embeddings-v2-base-en")
+# "jina" (HTTPS API) or "local" (ONNX model on CPU)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "jina")
+MODEL_ID = backend_class(EMBED_BACKEND).model_id
 
-if not JINA_API_KEY:
-    raise RuntimeError("JINA_API_KEY is not set")
+# Per-item character cap and per-request batch bounds
+MAX_CHARS = 8000
+BATCH_SIZE = int(os.getenv("JINA_BATCH_SIZE", "64"))
+BATCH_CHARS = int(os.getenv("JINA_BATCH_CHARS", "200000"))
 
+providers.register("embedder", lambda: backend_class(EMBED_BACKEND)())
 
-def embed(text: str):
-    if not text or not text.strip():
-        return None
-
-    response = requests.post(
-        "https://api.jina.ai/v1/embeddings",
-        headers={
-            "Authorization": f"Bearer {JINA_API_KEY}",
-            "Content-Type": "application/json"
-        },
-        json={
-            "model": JINA_MODEL,
-            "input": text[:8000]  # safety limit
-        }
+# Content-addressed cache: (model, sha256(text)) -> vector. The disk
+# tier is bounded: one-off vectors (e.g. prefilter chunks of a long
+# exhibit) age out instead of accumulating.
+_cache = TieredCache(
+    "embeddings",
+    maxsize=int(os.getenv("EMBED_CACHE_SIZE", "4096")),
+    disk=ExpiringStore(
+        "embedding_cache",
+        ttl=float(os.getenv("EMBED_DISK_TTL", str(30 * 24 * 3600))),
+        max_entries=int(os.getenv("EMBED_DISK_SIZE", "50000"))
     )
+)
+
+
+def cache_key(text: str) -> str:
+    return f"{MODEL_ID}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def cache_stats() -> dict:
+    return _cache.stats_snapshot()
+
+
+# ------------------------------
+# Backend call
+# ------------------------------
+def _post(inputs, retries: int = None):
+    backend = providers.get("embedder")
+    with metrics.span("embed", provider=backend.name):
+        return backend.embed_batch(inputs, retries=retries)
+
+
+def _batches(items, batch_size):
+    """
+    Groups (key, text) pairs into batches bounded by both
+    item count and total characters.
+    """
+    batch, chars = [], 0
+    for item in items:
+        size = len(item[1])
+        if batch and (len(batch) >= batch_size or chars + size > BATCH_CHARS):
+            yield batch
+            batch, chars = [], 0
+        batch.append(item)
+        chars += size
+    if batch:
+        yield batch
 
-    try:
-        payload = response.json()
-    except Exception:
-        raise RuntimeError(f"Invalid response from Jina: {response.text}")
 
-    if "data" not in payload:
-        raise RuntimeError(f"Jina error: {payload}")
+# ------------------------------
+# Public API
+# ------------------------------
+def embed_many(texts, batch_size: int = BATCH_SIZE, retries: int = None):
+    """
+    Embeds a list of strings in size-bounded batches.
+
+    - output order matches input order
+    - empty / whitespace-only items map to None
+    - over-length items are truncated to MAX_CHARS
+    - only failed batches are retried
+    - cached and duplicate texts are never sent
+    """
+    results = [None] * len(texts)
+
+    keyed = {}  # cache key -> (truncated text, [positions])
+    for i, t in enumerate(texts):
+        if not t or not t.strip():
+            continue
+        t = t[:MAX_CHARS]  # safety limit
+        keyed.setdefault(cache_key(t), (t, []))[1].append(i)
+
+    cached = _cache.get_many(keyed)
+    pending = [(k, t) for k, (t, _) in keyed.items() if k not in cached]
+
+    for batch in _batches(pending, max(1, batch_size)):
+        inputs = [t for _, t in batch]
+        vectors = _post(inputs, retries)
+
+        fresh = {k: vec for (k, _), vec in zip(batch, vectors)}
+        _cache.put_many(fresh)
+        cached.update(fresh)
+
+    for key, (_, positions) in keyed.items():
+        for i in positions:
+            results[i] = cached[key]
+
+    return results
+
+
+def embed(text: str):
+    if not text or not text.strip():
+        return None
 
-    return payload["data"][0]["embedding"]
+    return embed_many([text])[0]
@@ -1,26 +1,19 @@
 import os
+import time
 import hashlib
+import tempfile
+from contextlib import nullcontext
 import numpy as np
-from PIL import Image
 
-# ------------------------------
-# Optional dependencies (safe)
-# ------------------------------
-try:
-    import pdfplumber
-    PDF_AVAILABLE = True
-except Exception:
-    PDF_AVAILABLE = False
-
-try:
-    import pytesseract
-    OCR_AVAILABLE = True
-except Exception:
-    OCR_AVAILABLE = False
-
-from db import insert, fetch
-from embeddings import embed
-from llm import extract_facts
+from db import insert, insert_many, fetch
+from embeddings import MODEL_ID, embed_many
+from llm import extract_facts_chunked
+from chunking import chunk_text
+from cache import SQLiteStore, ExpiringStore
+import metrics
+from extraction import (
+    PDF_AVAILABLE, OCR_AVAILABLE, extract_pdf_pages, ocr_image
+)
 
 # ------------------------------
 # Storage
@@ -28,6 +21,35 @@ from llm import extract_facts
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(256 * 1024 * 1024)))
+
+
+# Embedding prefilter ahead of LLM fact extraction
+PREFILTER_TOKEN_BUDGET = int(os.getenv("PREFILTER_TOKEN_BUDGET", "8000"))
+PREFILTER_CHUNK_CHARS = int(os.getenv("PREFILTER_CHUNK_CHARS", "4000"))
+PREFILTER_CHUNK_OVERLAP = int(os.getenv("PREFILTER_CHUNK_OVERLAP", "400"))
+
+# Sidecar caches keyed by file hash: extracted text (bounded, expiring),
+# and facts per (file hash, incident), which also record the cases they
+# were stored for. Bump EXTRACTOR_VERSION when extraction changes.
+EXTRACTOR_VERSION = 2
+TEXT_CACHE_MAX_CHARS = int(os.getenv("TEXT_CACHE_MAX_CHARS", "2000000"))
+_text_cache = ExpiringStore(
+    "extraction_text",
+    ttl=float(os.getenv("TEXT_CACHE_TTL", str(30 * 24 * 3600))),
+    max_entries=int(os.getenv("TEXT_CACHE_SIZE", "2000"))
+)
+_extraction_cache = SQLiteStore("extraction")
+
+# A facts insert reserved by a job that never finished (crash, kill)
+# may be retaken after this many seconds
+FACTS_RESERVE_SECONDS = float(os.getenv("FACTS_RESERVE_SECONDS", "600"))
+
+
+class UploadTooLarge(ValueError):
+    pass
+
 
 # ------------------------------
 # Utilities
@@ -39,27 +61,71 @@ def cosine(a, b):
     return float(np.dot(a, b) / denom)
 
 
+def cosine_many(query, matrix):
+    """
+    Cosine of one vector against every row of `matrix`, vectorized.
+    """
+    m = np.asarray(matrix, dtype=np.float32)
+    q = np.asarray(query, dtype=np.float32)
+    denom = np.linalg.norm(m, axis=1) * np.linalg.norm(q)
+    dots = m @ q
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom != 0)
+
+
+def select_relevant(text: str, incident_text: str) -> str:
+    """
+    Embedding prefilter: keeps only the evidence chunks closest to the
+    incident, up to PREFILTER_TOKEN_BUDGET (~4 chars per token), in
+    document order. Text already within budget is returned unchanged.
+    """
+    budget_chars = PREFILTER_TOKEN_BUDGET * 4
+    if len(text) <= budget_chars:
+        return text
+
+    chunks = chunk_text(text, PREFILTER_CHUNK_CHARS, PREFILTER_CHUNK_OVERLAP)
+    vectors = embed_many([incident_text] + chunks)
+    incident_vec, chunk_vecs = vectors[0], vectors[1:]
+    if incident_vec is None:
+        return text
+
+    keep = [i for i, v in enumerate(chunk_vecs) if v is not None]
+    if not keep:
+        return text
+    scores = cosine_many(incident_vec, [chunk_vecs[i] for i in keep])
+
+    selected, used = [], 0
+    for j in np.argsort(-scores):
+        i = keep[j]
+        if selected and used + len(chunks[i]) > budget_chars:
+            continue
+        selected.append(i)
+        used += len(chunks[i])
+
+    return "\n\n".join(chunks[i] for i in sorted(selected))
+
+
 def extract_text(path: str, ext: str) -> str:
     """
     Extract text in an environment-safe manner.
     Never crashes the backend.
     """
+    with metrics.span("extract_text", provider="local", kind=ext):
+        return _extract_text(path, ext)
+
+
+def _extract_text(path: str, ext: str) -> str:
 
     # ---------- PDF ----------
     if ext == "pdf" and PDF_AVAILABLE:
-        text = ""
         try:
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
+            return "".join(extract_pdf_pages(path)).strip()
         except Exception:
-            pass
-        return text.strip()
+            return ""
 
     # ---------- IMAGE (OCR) ----------
     if ext in ["png", "jpg", "jpeg"] and OCR_AVAILABLE:
         try:
-            return pytesseract.image_to_string(Image.open(path)).strip()
+            return ocr_image(path).strip()
         except Exception:
             return ""
 
@@ -77,64 +143,213 @@ def extract_text(path: str, ext: str) -> str:
 # ------------------------------
 # Main pipeline
 # ------------------------------
-def add_evidence_file(case_id: int, side: str, file):
+def _stage(tracker, name):
+    return tracker.stage(name) if tracker else nullcontext()
+
+
+def save_upload(file):
     """
-    Evidence ingestion pipeline:
-    - hash preservation
-    - safe text extraction
-    - incident-anchored fact extraction
-    - semantic relevance gating
+    Streams an upload to disk under its content hash.
+    Constant memory: the file is copied in CHUNK_SIZE pieces to a temp
+    file while hashing, then atomically renamed into place.
+    Returns (file_hash, ext, path).
     """
 
-    # Read file
-    raw = file.file.read()
-    file_hash = hashlib.sha256(raw).hexdigest()
-
     ext = file.filename.split(".")[-1].lower()
-    path = f"{UPLOAD_DIR}/{file_hash}.{ext}"
+    digest = hashlib.sha256()
+    size = 0
+
+    tmp = tempfile.NamedTemporaryFile(
+        dir=UPLOAD_DIR, suffix=".part", delete=False
+    )
+    try:
+        with tmp:
+            while True:
+                chunk = file.file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(
+                        f"Upload exceeds {MAX_UPLOAD_BYTES} bytes"
+                    )
+                digest.update(chunk)
+                tmp.write(chunk)
+
+        file_hash = digest.hexdigest()
+        path = f"{UPLOAD_DIR}/{file_hash}.{ext}"
+        os.replace(tmp.name, path)
+    except BaseException:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+
+    return file_hash, ext, path
 
-    with open(path, "wb") as f:
-        f.write(raw)
 
-    # Extract text safely
-    extracted_text = extract_text(path, ext)
+def ingest_evidence(
+    case_id: int,
+    side: str,
+    file_name: str,
+    file_hash: str,
+    path: str,
+    ext: str,
+    tracker=None
+) -> str:
+    """
+    Runs the ingestion stages for an already-saved upload.
+    `tracker` (optional) receives per-stage timings.
+    Returns a short outcome label.
+    """
+
+    # Extract text safely (reuse a previous parse of the same file)
+    text_key = f"text:{EXTRACTOR_VERSION}:{file_hash}"
+    with _stage(tracker, "extract_text"):
+        extracted_text = _text_cache.get(text_key)
+        if extracted_text is None:
+            extracted_text = extract_text(path, ext)
+            if extracted_text.strip() \
+                    and len(extracted_text) <= TEXT_CACHE_MAX_CHARS:
+                _text_cache.put(text_key, extracted_text)
 
     # Store evidence metadata (always)
-    insert("evidence", {
-        "case_id": case_id,
-        "side": side,
-        "file_name": file.filename,
-        "hash": file_hash,
-        "extracted_text": extracted_text
-    })
+    with _stage(tracker, "store_evidence"):
+        insert("evidence", {
+            "case_id": case_id,
+            "side": side,
+            "file_name": file_name,
+            "hash": file_hash,
+            "extracted_text": extracted_text
+        })
 
     # If no usable text, stop here (no hallucination)
     if not extracted_text.strip():
-        return
+        return "no_text"
 
     # Fetch incident (ground truth anchor)
-    incident_row = fetch("incidents", {"id": case_id})
+    with _stage(tracker, "fetch_incident"):
+        incident_row = fetch("incidents", {"id": case_id})
     if not incident_row:
-        return
+        return "no_incident"
 
     incident_text = incident_row[0]["description"]
+    incident_hash = hashlib.sha256(incident_text.encode("utf-8")).hexdigest()
+    facts_key = f"facts:{file_hash}:{incident_hash}"
+
+    # Same exhibit against the same incident: no LLM or embedding calls
+    cached = _extraction_cache.get(facts_key)
+    if cached is None:
+        derived = _derive_facts(extracted_text, incident_text, tracker)
+        if derived is None:
+            # LLM / embedding outage: fail the job so it can be re-run
+            raise RuntimeError("Fact extraction inconclusive; retry later")
+        # A concurrent job may have stored its record first; keep it
+        cached = _extraction_cache.update(
+            facts_key, lambda current: current or derived
+        )
+
+    if cached["outcome"] != "grounded":
+        return cached["outcome"]
+
+    if case_id in cached["cases"]:
+        return "facts_exist"
+
+    # Cached under another embedding backend: same facts, new vector
+    if cached.get("model") != MODEL_ID:
+        with _stage(tracker, "reembed_facts"):
+            vector = embed_many([cached["facts"]])[0]
+        cached = _extraction_cache.update(
+            facts_key,
+            lambda current: {**current, "embedding": vector, "model": MODEL_ID}
+        )
+
+    # Reserve (facts, case) atomically so exactly one job inserts it
+    if not _reserve_case(facts_key, case_id):
+        return "facts_exist"
+
+    try:
+        with _stage(tracker, "store_facts"):
+            stored = insert_many("facts", [{
+                "case_id": case_id,
+                "facts": cached["facts"],
+                "embedding": cached["embedding"]
+            }])[0]
+        if not stored["ok"]:
+            raise RuntimeError(f"Facts insert failed: {stored['error']}")
+    except BaseException:
+        _release_case(facts_key, case_id, stored=False)
+        raise
+
+    _release_case(facts_key, case_id, stored=True)
+    return "facts_stored"
+
+
+def _reserve_case(facts_key: str, case_id: int) -> bool:
+    reserved = []
+
+    def reserve(current):
+        pending = current.setdefault("pending", {})
+        taken = pending.get(str(case_id))
+        if case_id in current["cases"] or (
+            taken and time.time() - taken < FACTS_RESERVE_SECONDS
+        ):
+            return None
+        pending[str(case_id)] = time.time()
+        reserved.append(True)
+        return current
+
+    _extraction_cache.update(facts_key, reserve)
+    return bool(reserved)
+
+
+def _release_case(facts_key: str, case_id: int, stored: bool):
+    def release(current):
+        current.get("pending", {}).pop(str(case_id), None)
+        if stored and case_id not in current["cases"]:
+            current["cases"].append(case_id)
+        return current
+
+    _extraction_cache.update(facts_key, release)
+
+
+def _derive_facts(extracted_text: str, incident_text: str, tracker=None):
+    """
+    LLM fact extraction + semantic grounding for one (evidence, incident)
+    pair. Returns a cacheable record, or None on a transient failure.
+    """
+
+    # Send only incident-relevant parts of long evidence to the LLM
+    with _stage(tracker, "prefilter"):
+        try:
+            relevant_text = select_relevant(extracted_text, incident_text)
+        except Exception:
+            relevant_text = extracted_text
 
     # Extract incident-anchored facts using LLM
-    facts = extract_facts(extracted_text, incident_text)
+    with _stage(tracker, "extract_facts"):
+        facts = extract_facts_chunked(relevant_text, incident_text)
 
     if facts == "NO RELEVANT FACTS":
-        return
+        return {"outcome": "no_relevant_facts"}
+
+    if facts == "INCONCLUSIVE":
+        return None  # LLM failure, never cache
 
     # Semantic grounding check (prevents drift)
-    try:
-        if cosine(embed(incident_text), embed(facts)) < 0.25:
-            return
-    except Exception:
-        return
-
-    # Persist grounded facts
-    insert("facts", {
-        "case_id": case_id,
+    with _stage(tracker, "grounding"):
+        try:
+            incident_vec, facts_vec = embed_many([incident_text, facts])
+            score = cosine(incident_vec, facts_vec)
+        except Exception:
+            return None
+
+    if score < 0.25:
+        return {"outcome": "ungrounded"}
+
+    return {
+        "outcome": "grounded",
         "facts": facts,
-        "embedding": embed(facts)
-    })
+        "embedding": facts_vec,
+        "model": MODEL_ID,
+        "cases": []
+    }
@@ -1,9 +1,16 @@
-import pdfplumber
+import os
 import re
-from embeddings import embed
-from db import insert
+import json
+import hashlib
+from embeddings import embed_many
+from db import insert_many, fetch, delete, table_signature
+from extraction import extract_pdf_pages
+from cache import CACHE_DIR
 
 PDF_PATH = "data/constitution.pdf"
+TABLE = "constitution_articles"
+CHUNK_SIZE = 50
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, "constitution_checkpoint.json")
 
 def extract_articles(text):
     """
@@ -21,14 +28,38 @@ def extract_articles(text):
     return articles
 
 
+def article_hash(title, body):
+    return hashlib.sha256(f"{title}\n{body}".encode("utf-8")).hexdigest()
+
+
+# --------------------------------------------------
+# CHECKPOINT (resume an interrupted run)
+# --------------------------------------------------
+def load_checkpoint(source_hash):
+    try:
+        with open(CHECKPOINT_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("source") == source_hash:
+            return set(data.get("done", []))
+    except (OSError, ValueError):
+        pass
+    return set()
+
+
+def save_checkpoint(source_hash, done):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"source": source_hash, "done": sorted(done)}, f)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
 def main():
-    full_text = ""
+    with open(PDF_PATH, "rb") as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
 
-    with pdfplumber.open(PDF_PATH) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                full_text += page_text + "\n"
+    pages = extract_pdf_pages(PDF_PATH, ocr=False)
+    full_text = "".join(p + "\n" for p in pages if p)
 
     if not full_text.strip():
         raise RuntimeError("❌ No text extracted from Constitution PDF")
@@ -37,16 +68,93 @@ def main():
 
     print(f"📘 Found {len(articles)} Articles")
 
+    # One entry per title (longest body wins), skipping noise
+    by_title = {}
     for title, body in articles:
         if len(body) < 50:
             continue  # skip noise
+        if len(body) > len(by_title.get(title, "")):
+            by_title[title] = body
+
+    # Current corpus state
+    existing = fetch(TABLE, columns=["id", "article_title", "article_text"])
+    signature = table_signature(TABLE)
+    if signature is None or (signature[0] and not existing):
+        raise RuntimeError("❌ Could not read existing Constitution rows")
+
+    done = load_checkpoint(source_hash)
+
+    # Classify every Article; anything else stored under one of these
+    # titles (old versions, duplicates from earlier runs) is stale
+    current = {t: article_hash(t, b) for t, b in by_title.items()}
+    existing_hashes, stale, seen_titles = set(), {}, set()
+    for r in existing:
+        title = r["article_title"]
+        h = article_hash(title, r["article_text"])
+        if title not in current:
+            continue
+        seen_titles.add(title)
+        if h == current[title] and h not in existing_hashes:
+            existing_hashes.add(h)
+        else:
+            stale.setdefault(title, []).append(r["id"])
+
+    added, changed, pending = 0, 0, []
+    for title, body in by_title.items():
+        h = current[title]
+        if h in existing_hashes or h in done:
+            continue
+        pending.append((title, body, h))
+        if title in seen_titles:
+            changed += 1
+        else:
+            added += 1
+
+    unchanged = len(by_title) - len(pending)
+
+    # Chunked bulk writes, checkpointed after every chunk
+    for start in range(0, len(pending), CHUNK_SIZE):
+        chunk = pending[start:start + CHUNK_SIZE]
+        vectors = embed_many([body for _, body, _ in chunk])
+
+        rows = [
+            {
+                "article_title": title,
+                "article_text": body,
+                "embedding": vector
+            }
+            for (title, body, _), vector in zip(chunk, vectors)
+        ]
+        results = insert_many(TABLE, rows)
+        written = [a for a, r in zip(chunk, results) if r["ok"]]
+
+        # Drop superseded versions only after the new rows exist
+        ids = [i for title, _, _ in written for i in stale.pop(title, [])]
+        if ids:
+            delete(TABLE, {"id": ids})
+
+        done.update(h for _, _, h in written)
+        save_checkpoint(source_hash, done)
+
+        if len(written) != len(chunk):
+            failed = [a[0] for a, r in zip(chunk, results) if not r["ok"]]
+            raise RuntimeError(
+                f"❌ Insert failed for {len(failed)} Articles "
+                f"(first: {failed[0]}); rerun to resume"
+            )
+
+    # Leftover duplicates under unchanged titles
+    ids = [i for row_ids in stale.values() for i in row_ids]
+    if ids:
+        delete(TABLE, {"id": ids})
 
-        insert("constitution_articles", {
-            "article_title": title,
-            "article_text": body,
-            "embedding": embed(body)
-        })
+    # Completed: the next run starts from the database state alone
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
 
+    print(
+        f"📊 Added: {added} | Changed: {changed} | Unchanged: {unchanged}"
+    )
     print("✅ Constitution successfully loaded into database")
 
 
@@ -0,0 +1,246 @@
+import os
+import queue
+import multiprocessing
+from importlib.util import find_spec
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import providers
+
+# ------------------------------
+# Optional dependencies (detected, imported on first use)
+# ------------------------------
+PDF_AVAILABLE = find_spec("pdfplumber") is not None
+OCR_AVAILABLE = (
+    find_spec("pytesseract") is not None and find_spec("PIL") is not None
+)
+
+# ------------------------------
+# Config
+# ------------------------------
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "10"))
+
+# OCR fallback for pages without a text layer (scanned PDFs)
+OCR_FALLBACK = os.getenv("OCR_FALLBACK", "1") == "1"
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "200"))
+OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60"))
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+
+# "spawn" keeps workers clean even when the parent runs threads
+_MP_CONTEXT = os.getenv("EXTRACT_MP_START", "spawn")
+
+
+# ------------------------------
+# Killable process pool
+# ------------------------------
+def _serve(conn):
+    """
+    Worker process loop: runs (fn, args) tasks until the pipe closes.
+    """
+    conn.send(None)  # ready; start-up time does not count against tasks
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.conn.recv()
+
+    def run(self, fn, args, timeout: float):
+        self.conn.send((fn, args))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"{fn.__name__} exceeded {timeout:.0f}s")
+        ok, value = self.conn.recv()
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ExtractPool:
+    """
+    Long-lived worker processes with a hard per-task deadline. The
+    deadline starts when a worker picks the task up, not when it is
+    queued; a worker that overruns (or dies) is killed and replaced.
+    """
+
+    def __init__(self, workers: int, ctx):
+        self._ctx = ctx
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(None)  # started on first use
+        self._dispatch = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="extract"
+        )
+
+    def submit(self, timeout: float, fn, *args) -> Future:
+        return self._dispatch.submit(self._run, timeout, fn, args)
+
+    def _run(self, timeout, fn, args):
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = _Worker(self._ctx)
+            return worker.run(fn, args, timeout)
+        except (TimeoutError, EOFError, OSError):
+            if worker is not None:
+                worker.stop()
+            worker = None
+            raise
+        finally:
+            self._idle.put(worker)
+
+
+providers.register("extract_pool", lambda: ExtractPool(
+    max(1, EXTRACT_WORKERS), multiprocessing.get_context(_MP_CONTEXT)
+))
+
+
+def get_pool() -> ExtractPool:
+    """
+    Process pool shared by every CPU-bound extraction path.
+    """
+    return providers.get("extract_pool")
+
+
+# ------------------------------
+# Worker-side functions (must stay top-level / picklable)
+# ------------------------------
+def _page_count(path: str) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_range(path: str, start: int, stop: int) -> list:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [
+            pdf.pages[i].extract_text() or ""
+            for i in range(start, stop)
+        ]
+
+
+def _ocr_pdf_page(path: str, index: int) -> str:
+    import pdfplumber
+    import pytesseract
+
+    with pdfplumber.open(path) as pdf:
+        image = pdf.pages[index].to_image(resolution=OCR_DPI).original
+    return pytesseract.image_to_string(image)
+
+
+def _ocr_image(path: str) -> str:
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return pytesseract.image_to_string(image)
+
+
+# ------------------------------
+# Public API
+# ------------------------------
+def extract_pdf_pages(path: str, ocr: bool = OCR_FALLBACK) -> list:
+    """
+    Extracts the text layer of every page, in page order.
+
+    Everything runs on the shared process pool under a hard deadline,
+    including the page count (PAGE_TIMEOUT) and single-range
+    documents, so a malformed PDF can never hang the caller. A range
+    that runs past PAGE_TIMEOUT per page is killed and, like a failed
+    range, retried one page per task so a single bad page yields an
+    empty page instead of failing the document. With `ocr`, pages that
+    have no text layer are rendered and OCR'd (up to OCR_MAX_PAGES).
+    """
+    if not PDF_AVAILABLE:
+        return []
+
+    pool = get_pool()
+    n = pool.submit(PAGE_TIMEOUT, _page_count, path).result()
+    step = max(1, PAGES_PER_TASK)
+
+    ranges = [(a, min(a + step, n)) for a in range(0, n, step)]
+    futures = [
+        pool.submit(PAGE_TIMEOUT * (b - a), _extract_range, path, a, b)
+        for a, b in ranges
+    ]
+
+    pages, retry = [], []
+    for (a, b), fut in zip(ranges, futures):
+        try:
+            pages.extend(fut.result())
+        except Exception:  # timeout (worker killed) or failure
+            pages.extend([""] * (b - a))
+            if b - a > 1:
+                retry.extend(range(a, b))
+
+    singles = [
+        (i, pool.submit(PAGE_TIMEOUT, _extract_range, path, i, i + 1))
+        for i in retry
+    ]
+    for i, fut in singles:
+        try:
+            pages[i] = fut.result()[0]
+        except Exception:
+            pass
+
+    if ocr and OCR_AVAILABLE:
+        blank = [i for i, p in enumerate(pages) if not p.strip()]
+        _ocr_pages(path, pages, blank[:OCR_MAX_PAGES])
+
+    return pages
+
+
+def _ocr_pages(path: str, pages: list, indexes: list):
+    """
+    OCRs the given page indexes in place, one page per pool task.
+    """
+    if not indexes:
+        return
+
+    pool = get_pool()
+    futures = [
+        (i, pool.submit(OCR_PAGE_TIMEOUT, _ocr_pdf_page, path, i))
+        for i in indexes
+    ]
+    for i, fut in futures:
+        try:
+            pages[i] = fut.result() or ""
+        except Exception:  # timeout (worker killed) or failure
+            pass
+
+
+def ocr_image(path: str) -> str:
+    """
+    OCRs a single image on the shared pool.
+    """
+    if not OCR_AVAILABLE:
+        return ""
+
+    fut = get_pool().submit(OCR_PAGE_TIMEOUT, _ocr_image, path)
+    try:
+        return fut.result() or ""
+    except Exception:
+        return ""
@@ -1,15 +1,16 @@
-from db import insert
+from db import insert_many
 from embeddings import embed
-from llm import extract_facts
+from llm import extract_facts_chunked
 
 
 def promote_facts(case_id, evidence_text, incident_text):
-    facts = extract_facts(evidence_text, incident_text)
+    facts = extract_facts_chunked(evidence_text, incident_text)
     if facts == "NO RELEVANT FACTS":
         return None
 
-    return insert("facts", {
+    result = insert_many("facts", [{
         "case_id": case_id,
         "facts": facts,
         "embedding": embed(facts)
-    })
+    }])[0]
+    return [result["data"]] if result["ok"] and result["data"] else []
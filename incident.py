@@ -1,4 +1,8 @@
-from db import insert, fetch
+import os
+from db import insert, fetch, fetch_concurrent, fetch_page, rpc
+
+# Fetch the light case history with a single Postgres function call
+CASE_HISTORY_RPC = os.getenv("CASE_HISTORY_RPC", "0") == "1"
 
 
 # ======================================================
@@ -18,14 +22,103 @@ def create_incident(title: str, description: str):
 # ======================================================
 # CASE HISTORY (AUDITABLE RECORD)
 # ======================================================
-def get_case_history(case_id: int):
+# Light projections: what the case page renders. Embeddings and
+# extracted evidence text are loaded per row via get_case_row().
+HISTORY_COLUMNS = {
+    "incident": ["id", "title", "description"],
+    "claims": ["id", "case_id", "side", "text"],
+    "evidence": ["id", "case_id", "side", "file_name", "hash"],
+    "facts": ["id", "case_id", "facts"]
+}
+
+SECTION_TABLES = {
+    "incident": "incidents",
+    "claims": "claims",
+    "evidence": "evidence",
+    "facts": "facts"
+}
+
+
+def get_case_history(case_id: int, full: bool = False):
     """
     Reconstructs the complete case state.
+    `full=True` includes heavy fields (embeddings, evidence text).
+
+    The four tables are read concurrently. With CASE_HISTORY_RPC=1 the
+    light history comes from one `get_case_history(p_case_id)` Postgres
+    function returning {incident, claims, evidence, facts} as JSON.
     """
 
+    if CASE_HISTORY_RPC and not full:
+        bundle = rpc("get_case_history", {"p_case_id": case_id})
+        if isinstance(bundle, dict) and "incident" in bundle:
+            return {k: bundle.get(k) or [] for k in SECTION_TABLES}
+
+    return fetch_concurrent({
+        section: (
+            table,
+            {"id" if section == "incident" else "case_id": case_id},
+            None if full else HISTORY_COLUMNS[section]
+        )
+        for section, table in SECTION_TABLES.items()
+    })
+
+
+def get_case_page(
+    case_id: int,
+    section: str,
+    after: int = None,
+    limit: int = 100,
+    full: bool = False
+):
+    """
+    One cursor page of a history section, ordered by id.
+    Pass the returned `next_cursor` as `after` for the next page.
+    Raises db_errors() when the page cannot be read, so a failure is
+    never mistaken for the end of the section.
+    """
+    if section not in SECTION_TABLES:
+        raise ValueError(f"section must be one of {list(SECTION_TABLES)}")
+
+    rows = fetch_page(
+        SECTION_TABLES[section],
+        {"id" if section == "incident" else "case_id": case_id},
+        columns=None if full else HISTORY_COLUMNS[section],
+        after=after,
+        limit=limit,
+        strict=True
+    )
     return {
-        "incident": fetch("incidents", {"id": case_id}),
-        "claims": fetch("claims", {"case_id": case_id}),
-        "evidence": fetch("evidence", {"case_id": case_id}),
-        "facts": fetch("facts", {"case_id": case_id})
+        "section": section,
+        "rows": rows,
+        "next_cursor": rows[-1]["id"] if len(rows) == limit else None
     }
+
+
+def iter_case_history(case_id: int, full: bool = False, page_size: int = 100):
+    """
+    Yields {"section", "row"} records page by page, so memory stays
+    bounded by `page_size` however large the case is. A failed read
+    raises (see get_case_page).
+    """
+    for section in SECTION_TABLES:
+        after = None
+        while True:
+            page = get_case_page(case_id, section, after, page_size, full)
+            for row in page["rows"]:
+                yield {"section": section, "row": row}
+            after = page["next_cursor"]
+            if after is None:
+                break
+
+
+def get_case_row(case_id: int, section: str, row_id: int):
+    """
+    Loads one claim / evidence / fact row with every column.
+    Returns None when the row does not belong to the case.
+    """
+    if section not in ("claims", "evidence", "facts"):
+        raise ValueError("section must be 'claims', 'evidence' or 'facts'")
+
+    rows = fetch(SECTION_TABLES[section], {"id": row_id, "case_id": case_id})
+    return rows[0] if rows else None
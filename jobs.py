@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import uuid
+import socket
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import providers
+from cache import CACHE_DIR, SQLiteBacked
+
+# ------------------------------
+# Config
+# ------------------------------
+JOBS_DB = os.getenv("LEXI_JOBS_DB", os.path.join(CACHE_DIR, "jobs.sqlite"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_QUEUE_LIMIT = int(os.getenv("INGEST_QUEUE_LIMIT", "100"))
+
+# "inline"   -> the API process runs jobs on its own worker pool
+# "external" -> the API only enqueues; `python worker.py` runs them
+INGEST_MODE = os.getenv("INGEST_MODE", "inline")
+
+# The job DB lives on this host's disk: job ids are only known to the
+# instance (and workers) that share it.
+HOSTNAME = socket.gethostname()
+
+
+def _worker_id() -> str:
+    return f"{HOSTNAME}:{os.getpid()}"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+# ------------------------------
+# Job store (SQLite, shared by API and worker processes)
+# ------------------------------
+class JobStore(SQLiteBacked):
+
+    def __init__(self, path: str = JOBS_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._setup(path, [
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " stages TEXT NOT NULL DEFAULT '[]',"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " worker TEXT)"
+        ], timeout=30)
+
+    def _migrate(self, conn):
+        columns = {r[1] for r in conn.execute("PRAGMA table_info(jobs)")}
+        if "worker" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+
+    def create(self, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            queued = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+            if queued >= INGEST_QUEUE_LIMIT:
+                raise QueueFull("Ingestion queue is full")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) "
+                "VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(payload), time.time())
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim(self, job_id: str = None):
+        """
+        Atomically moves one queued job (or `job_id`) to running.
+        Returns its payload row, or None if nothing was claimed.
+        """
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            if job_id:
+                row = cur.execute(
+                    "SELECT id, payload FROM jobs "
+                    "WHERE id = ? AND status = 'queued'",
+                    (job_id,)
+                ).fetchone()
+            else:
+                row = cur.execute(
+                    "SELECT id, payload FROM jobs WHERE status = 'queued' "
+                    "ORDER BY created_at LIMIT 1"
+                ).fetchone()
+            if row:
+                cur.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, "
+                    "worker = ? WHERE id = ?",
+                    (time.time(), _worker_id(), row[0])
+                )
+            self._conn.commit()
+        if not row:
+            return None
+        return {"id": row[0], "payload": json.loads(row[1])}
+
+    def recover(self) -> list:
+        """
+        Re-queues jobs left 'running' by processes on this host that no
+        longer exist (restart, deploy, crash). Returns every queued id,
+        oldest first.
+        """
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            stale = []
+            for job_id, worker in cur.execute(
+                "SELECT id, worker FROM jobs WHERE status = 'running'"
+            ).fetchall():
+                host, _, pid = (worker or "").rpartition(":")
+                if not worker or (host == HOSTNAME and pid.isdigit()
+                                  and not _alive(int(pid))):
+                    stale.append(job_id)
+            cur.executemany(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, "
+                "worker = NULL, stages = '[]' WHERE id = ?",
+                [(job_id,) for job_id in stale]
+            )
+            queued = [r[0] for r in cur.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' "
+                "ORDER BY created_at"
+            )]
+            self._conn.commit()
+        return queued
+
+    def set_stages(self, job_id: str, stages: list):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stages = ? WHERE id = ?",
+                (json.dumps(stages), job_id)
+            )
+            self._conn.commit()
+
+    def finish(self, job_id: str, result: str = None, error: str = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, "
+                "finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", result, error,
+                 time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, payload, stages, result, error, "
+                "created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+
+        created, started, finished = row[6], row[7], row[8]
+        return {
+            "id": row[0],
+            "status": row[1],
+            "payload": json.loads(row[2]),
+            "stages": json.loads(row[3]),
+            "result": row[4],
+            "error": row[5],
+            "created_at": created,
+            "started_at": started,
+            "finished_at": finished,
+            "queue_ms": round((started - created) * 1000, 1)
+            if started else None,
+            "total_ms": round((finished - created) * 1000, 1)
+            if finished else None
+        }
+
+
+# ------------------------------
+# Per-stage tracking
+# ------------------------------
+class StageTracker:
+    """
+    Records status and duration of each pipeline stage on a job.
+    """
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        entry = {"name": name, "status": "running", "duration_ms": None}
+        self.stages.append(entry)
+        self.store.set_stages(self.job_id, self.stages)
+
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            raise
+        else:
+            entry["status"] = "done"
+        finally:
+            entry["duration_ms"] = round(
+                (time.perf_counter() - start) * 1000, 1
+            )
+            self.store.set_stages(self.job_id, self.stages)
+
+
+# ------------------------------
+# Execution
+# ------------------------------
+def _create_ingest_pool():
+    # A fresh process first picks up whatever a previous one left behind
+    pool = ThreadPoolExecutor(
+        max_workers=INGEST_WORKERS,
+        thread_name_prefix="ingest"
+    )
+    for job_id in get_store().recover():
+        pool.submit(_run_by_id, job_id)
+    return pool
+
+
+providers.register("job_store", JobStore)
+providers.register("ingest_pool", _create_ingest_pool)
+
+
+def get_store() -> JobStore:
+    return providers.get("job_store")
+
+
+def run_job(job: dict):
+    from evidence import ingest_evidence
+
+    store = get_store()
+    tracker = StageTracker(store, job["id"])
+    try:
+        outcome = ingest_evidence(tracker=tracker, **job["payload"])
+    except Exception as e:
+        store.finish(job["id"], error=f"{type(e).__name__}: {e}")
+    else:
+        store.finish(job["id"], result=outcome)
+
+
+def _run_by_id(job_id: str):
+    job = get_store().claim(job_id)
+    if job:
+        run_job(job)
+
+
+def enqueue_evidence(
+    case_id: int,
+    side: str,
+    file_name: str,
+    file_hash: str,
+    path: str,
+    ext: str
+) -> str:
+    """
+    Queues an already-saved upload for ingestion and returns the job id.
+    """
+    job_id = get_store().create({
+        "case_id": case_id,
+        "side": side,
+        "file_name": file_name,
+        "file_hash": file_hash,
+        "path": path,
+        "ext": ext
+    })
+
+    if INGEST_MODE == "inline":
+        providers.get("ingest_pool").submit(_run_by_id, job_id)
+
+    return job_id
+
+
+def start():
+    """
+    Starts inline ingestion (and recovery of unfinished jobs) at boot
+    rather than on the first upload.
+    """
+    if INGEST_MODE == "inline":
+        providers.get("ingest_pool")
+
+
+def get_job(job_id: str):
+    return get_store().get(job_id)
@@ -1,32 +1,131 @@
 import os
-import google.generativeai as genai
+import re
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
+import metrics
+import providers
+import resilience
+from cache import ExpiringStore
+from chunking import chunk_text, split_bullets
+
+# ======================================================
+# Gemini setup (configured on first call, once per process)
+# ======================================================
+MODEL_NAME = "gemini-flash-latest"
+GENERATION_CONFIG = {"temperature": 0.0, "max_output_tokens": 512}
+
+# Optional endpoint override (e.g. the offline benchmark stand-in)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+
+
+def _create_model():
+    import google.generativeai as genai
+
+    (api_key,) = providers.require_env("GEMINI_API_KEY")
+    if GEMINI_API_ENDPOINT:
+        genai.configure(
+            api_key=api_key,
+            transport="rest",
+            client_options={"api_endpoint": GEMINI_API_ENDPOINT}
+        )
+    else:
+        genai.configure(api_key=api_key)
+
+    return genai.GenerativeModel(MODEL_NAME)
+
+
+providers.register("gemini", _create_model)
+
 # ======================================================
-# Gemini setup
+# Response cache (temperature 0 => deterministic)
 # ======================================================
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise RuntimeError("GEMINI_API_KEY is not set")
+_cache = ExpiringStore(
+    "llm",
+    ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "5000"))
+)
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
 
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-flash-latest")
+
+def _transient_errors():
+    """
+    Retried with backoff; anything else fails straight to INCONCLUSIVE.
+    """
+    from google.api_core import exceptions as gexc
+
+    return (
+        gexc.ResourceExhausted,
+        gexc.ServiceUnavailable,
+        gexc.DeadlineExceeded,
+        gexc.InternalServerError
+    )
+
+
+def _cache_key(prompt: str, config: dict) -> str:
+    raw = json.dumps(
+        {"model": MODEL_NAME, "config": config, "prompt": prompt},
+        sort_keys=True
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    return {
+        **stats,
+        "hit_rate": round(stats["hits"] / total, 4) if total else 0.0
+    }
 
 
 # ======================================================
 # Low-level call
 # ======================================================
 def call_llm(prompt: str) -> str:
+    key = _cache_key(prompt, GENERATION_CONFIG)
+    cached = _cache.get(key)
+    if cached is not None:
+        _count("hits")
+        return cached
+    _count("misses")
+
+    # Outside the try: a missing key or package is a configuration
+    # error, never an INCONCLUSIVE answer
+    model = providers.get("gemini")
+    retry_on = _transient_errors()
+
     try:
-        res = model.generate_content(
-            prompt,
-            generation_config={"temperature": 0.0, "max_output_tokens": 512}
-        )
+        with metrics.span("call_llm", provider="gemini"):
+            res = resilience.get("gemini").call(
+                lambda: model.generate_content(
+                    prompt,
+                    generation_config=GENERATION_CONFIG
+                ),
+                retry_on=retry_on
+            )
         parts = res.candidates[0].content.parts
-        return "\n".join(p.text.strip() for p in parts if hasattr(p, "text"))
+        text = "\n".join(p.text.strip() for p in parts if hasattr(p, "text"))
     except Exception:
+        return "INCONCLUSIVE"  # error fallback is never cached
+
+    # No text parts (e.g. a safety block): a failure, not an answer
+    if not text.strip():
         return "INCONCLUSIVE"
 
+    _cache.put(key, text)
+    return text
+
 
 # ======================================================
 # STEP 2 — Criminal / Civil Maintainability
@@ -145,3 +244,56 @@ NO RELEVANT FACTS
 """
 
     return call_llm(prompt)
+
+
+# ======================================================
+# MAP-REDUCE FACT EXTRACTION (LONG EVIDENCE)
+# ======================================================
+FACT_CHUNK_CHARS = int(os.getenv("FACT_CHUNK_CHARS", "12000"))
+FACT_CHUNK_OVERLAP = int(os.getenv("FACT_CHUNK_OVERLAP", "800"))
+# LLM calls in flight for chunked extraction, across all ingestions
+FACT_CONCURRENCY = int(os.getenv("FACT_CONCURRENCY", "4"))
+
+providers.register("fact_pool", lambda: ThreadPoolExecutor(
+    max_workers=max(1, FACT_CONCURRENCY),
+    thread_name_prefix="facts"
+))
+
+
+def merge_facts(results: List[str]) -> str:
+    """
+    Merges per-chunk bullet lists into one deduplicated list.
+    Any failed chunk makes the whole result INCONCLUSIVE (never cached).
+    """
+    if any(r == "INCONCLUSIVE" for r in results):
+        return "INCONCLUSIVE"
+
+    seen, merged = set(), []
+    for r in results:
+        if r.strip() == "NO RELEVANT FACTS":
+            continue
+        for fact in split_bullets(r):
+            norm = re.sub(r"[^a-z0-9 ]", "", " ".join(fact.lower().split()))
+            if norm and norm not in seen:
+                seen.add(norm)
+                merged.append(f"- {fact}")
+
+    return "\n".join(merged) if merged else "NO RELEVANT FACTS"
+
+
+def extract_facts_chunked(evidence_text: str, incident_text: str) -> str:
+    """
+    extract_facts over overlapping chunks of long evidence, on the
+    shared fact_pool (FACT_CONCURRENCY calls in flight process-wide),
+    merged into one fact set.
+    """
+    chunks = chunk_text(evidence_text, FACT_CHUNK_CHARS, FACT_CHUNK_OVERLAP)
+    if len(chunks) <= 1:
+        return extract_facts(evidence_text, incident_text)
+
+    pool = providers.get("fact_pool")
+    results = list(pool.map(
+        lambda chunk: extract_facts(chunk, incident_text), chunks
+    ))
+
+    return merge_facts(results)
@@ -1,26 +1,190 @@
-
-from fastapi import FastAPI, UploadFile, File, Form
+import json
+import time
+import asyncio
+import threading
+from typing import List
+from fastapi import (
+    FastAPI, UploadFile, File, Form, HTTPException, Request, Response,
+    Query, Body
+)
+from fastapi.responses import (
+    StreamingResponse, PlainTextResponse, JSONResponse
+)
+from starlette.concurrency import iterate_in_threadpool
 from schemas import IncidentIn, ClaimIn
-from incident import create_incident, get_case_history
+from incident import (
+    create_incident, get_case_history, get_case_row, get_case_page,
+    iter_case_history
+)
 from claims import add_claim
-from evidence import add_evidence_file
-from llm import constitutional_check, maintainability_check
-from db import fetch_similar_constitution_articles, fetch
+from evidence import save_upload, UploadTooLarge, MAX_UPLOAD_BYTES
+from jobs import enqueue_evidence, get_job, QueueFull, start as start_jobs
+from db import count, db_errors
+from screening import (
+    screen, screen_many, SCREEN_BATCH_LIMIT, STOP_POLL_SECONDS
+)
 from rules import decide_with_reason
+import case_cache
+import metrics
+import resilience
+import embeddings
+import llm
 
 app = FastAPI(title="LEXI Judicial System")
 
 
+# ======================================================
+# UPLOAD SIZE LIMIT (while the body is received)
+# ======================================================
+# Multipart boundaries and the other form fields on top of the file
+UPLOAD_BODY_SLACK = 1024 * 1024
+
+
+class UploadLimit:
+    """
+    Rejects request bodies over `limit` bytes on `paths` as they
+    arrive: by Content-Length up front, else once the streamed body
+    passes the limit, before the multipart parser spools it to disk.
+    """
+
+    def __init__(self, app, paths, limit: int):
+        self.app = app
+        self.paths = set(paths)
+        self.limit = limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        detail = f"Upload exceeds {MAX_UPLOAD_BYTES} bytes"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.limit:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(
+    UploadLimit,
+    paths=["/evidence/upload"],
+    limit=MAX_UPLOAD_BYTES + UPLOAD_BODY_SLACK
+)
+
+
+@app.on_event("startup")
+def resume_ingestion():
+    start_jobs()
+
+
+# ======================================================
+# METRICS
+# ======================================================
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500  # unless a response comes back
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.observe(
+            "lexi_http_request_seconds",
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status
+        )
+
+
+def _collect():
+    samples = []
+    for provider, stats in resilience.stats().items():
+        for key, value in stats.items():
+            if key == "state":
+                samples.append((
+                    "lexi_circuit_open", "gauge",
+                    {"provider": provider}, int(value != "closed")
+                ))
+            else:
+                samples.append((
+                    f"lexi_provider_{key}_total", "counter",
+                    {"provider": provider}, value
+                ))
+    for cache, stats in (
+        ("embeddings", embeddings.cache_stats()),
+        ("llm", llm.cache_stats())
+    ):
+        for key, value in stats.items():
+            if key != "hit_rate":
+                samples.append((
+                    "lexi_cache_events_total", "counter",
+                    {"cache": cache, "event": key}, value
+                ))
+    return samples
+
+
+metrics.register_collector(_collect)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.post("/screen-incident")
 def screen_incident(incident: str):
-    articles = fetch_similar_constitution_articles(incident, top_k=5)
-    constitutional = constitutional_check(incident, articles)
-    maintainability = maintainability_check(incident)
+    return screen(incident)
+
 
-    return {
-        "constitutional": constitutional,
-        "maintainability": maintainability
-    }
+@app.post("/screen-incidents")
+async def screen_incidents(request: Request, incidents: List[str] = Body(...)):
+    if len(incidents) > SCREEN_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {SCREEN_BATCH_LIMIT} incidents per request"
+        )
+
+    # One JSON object per line, each tagged with its input index,
+    # written as soon as that incident's checks finish
+    stop = threading.Event()
+
+    async def watch():
+        while not stop.is_set():
+            if await request.is_disconnected():
+                stop.set()
+                return
+            await asyncio.sleep(STOP_POLL_SECONDS)
+
+    async def lines():
+        watcher = asyncio.create_task(watch())
+        try:
+            async for result in iterate_in_threadpool(
+                screen_many(incidents, stop=stop)
+            ):
+                yield json.dumps(result, default=str) + "\n"
+        finally:
+            # Cancels the batch's queued checks on the shared pool
+            stop.set()
+            watcher.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @app.post("/incident")
@@ -39,16 +203,91 @@ def upload_evidence(
     side: str = Form(...),
     file: UploadFile = File(...)
 ):
-    add_evidence_file(case_id, side, file)
-    return {"status": "ok"}
+    try:
+        file_hash, ext, path = save_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        job_id = enqueue_evidence(
+            case_id, side, file.filename, file_hash, path, ext
+        )
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"status": "queued", "job_id": job_id}
+
+
+@app.get("/evidence/jobs/{job_id}")
+def evidence_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @app.get("/case/{case_id}/history")
-def history(case_id: int):
-    return get_case_history(case_id)
+def history(
+    case_id: int,
+    request: Request,
+    response: Response,
+    full: bool = False,
+    section: str = None,
+    after: int = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    # Cursor-paginated view of a single section
+    if section is not None:
+        try:
+            return get_case_page(case_id, section, after, limit, full)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except db_errors() as e:
+            raise HTTPException(
+                status_code=503, detail=f"Case history unavailable: {e}"
+            )
+
+    # Unchanged since the client's copy: signature reads only, no payload
+    # (full histories are never tagged; see case_cache)
+    v = None if full else case_cache.version(case_id)
+    tag = case_cache.etag(case_id, full, v)
+    if case_cache.matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers={"ETag": tag})
+
+    tag, data = case_cache.get_history(
+        case_id, full, lambda: get_case_history(case_id, full=full), v
+    )
+    if tag:
+        response.headers["ETag"] = tag
+    return data
+
+
+@app.get("/case/{case_id}/history.ndjson")
+def history_stream(case_id: int, full: bool = False):
+    # One JSON object per line, emitted while pages are still being read
+    def lines():
+        try:
+            for record in iter_case_history(case_id, full=full):
+                yield json.dumps(record, default=str) + "\n"
+        except db_errors() as e:
+            # Headers are already sent: end with an explicit error line
+            # so a truncated case never looks complete
+            yield json.dumps({"error": f"Case history unavailable: {e}"}) \
+                + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/case/{case_id}/{section}/{row_id}")
+def case_row(case_id: int, section: str, row_id: int):
+    try:
+        row = get_case_row(case_id, section, row_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if row is None:
+        raise HTTPException(status_code=404, detail="Row not found")
+    return row
 
 
 @app.get("/verdict-with-reason")
 def verdict(case_id: int, score: float, case_type: str):
-    facts = fetch("facts", {"case_id": case_id})
-    return decide_with_reason(score, case_type, len(facts))
+    facts_count = count("facts", {"case_id": case_id})
+    return decide_with_reason(score, case_type, facts_count)
@@ -0,0 +1,154 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# ======================================================
+# IN-PROCESS METRICS (Prometheus text format)
+# ======================================================
+# Cheap enough to leave on: one perf_counter pair and one locked
+# dict update per span.
+
+BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+_lock = threading.Lock()
+_histograms = {}   # name -> {labels: [bucket counts..., sum, count]}
+_counters = {}     # name -> {labels: value}
+_help = {}
+_collectors = []   # callables returning extra samples at scrape time
+
+
+def _key(labels: dict):
+    # None means "label not applicable"; 0, False and "" are values
+    return tuple(sorted(
+        (k, str(v)) for k, v in labels.items() if v is not None
+    ))
+
+
+def observe(name: str, seconds: float, **labels):
+    key = _key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        row = series.get(key)
+        if row is None:
+            row = series[key] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                row[i] += 1
+        row[-2] += seconds
+        row[-1] += 1
+
+
+def inc(name: str, amount: float = 1, **labels):
+    key = _key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    Times a block into lexi_stage_seconds{stage, ...}; failures are
+    also counted in lexi_stage_errors_total.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc("lexi_stage_errors_total", stage=stage, **labels)
+        raise
+    finally:
+        observe(
+            "lexi_stage_seconds",
+            time.perf_counter() - start,
+            stage=stage,
+            **labels
+        )
+
+
+def describe(name: str, text: str):
+    _help[name] = text
+
+
+def register_collector(fn):
+    """
+    `fn()` returns [(name, type, {labels}, value), ...] at scrape time.
+    """
+    _collectors.append(fn)
+
+
+# ------------------------------
+# Exposition
+# ------------------------------
+def _fmt_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(
+            k, v.replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", " ")
+        )
+        for k, v in pairs
+    )
+    return "{" + inner + "}"
+
+
+def render() -> str:
+    lines = []
+
+    with _lock:
+        histograms = {n: {k: list(r) for k, r in s.items()}
+                      for n, s in _histograms.items()}
+        counters = {n: dict(s) for n, s in _counters.items()}
+
+    for name, series in sorted(histograms.items()):
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, row in series.items():
+            for bound, c in zip(BUCKETS, row):
+                lines.append(
+                    f"{name}_bucket"
+                    f"{_fmt_labels(key + (('le', str(bound)),))} {c}"
+                )
+            lines.append(
+                f"{name}_bucket{_fmt_labels(key + (('le', '+Inf'),))} "
+                f"{row[-1]}"
+            )
+            lines.append(f"{name}_sum{_fmt_labels(key)} {row[-2]}")
+            lines.append(f"{name}_count{_fmt_labels(key)} {row[-1]}")
+
+    for name, series in sorted(counters.items()):
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in series.items():
+            lines.append(f"{name}{_fmt_labels(key)} {value}")
+
+    # Collector samples grouped per family: every line of a metric
+    # must follow its one HELP / TYPE header contiguously
+    families = {}  # name -> (type, [lines])
+    for collect in _collectors:
+        try:
+            samples = collect()
+        except Exception:
+            continue
+        for name, kind, labels, value in samples:
+            family = families.setdefault(name, (kind, []))
+            family[1].append(f"{name}{_fmt_labels(_key(labels))} {value}")
+
+    for name, (kind, samples) in families.items():
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    return "\n".join(lines) + "\n"
+
+
+describe("lexi_stage_seconds", "Latency of instrumented hot-path stages")
+describe("lexi_stage_errors_total", "Stages that raised")
+describe("lexi_http_request_seconds", "API request latency by route")
@@ -0,0 +1,53 @@
+import os
+import threading
+
+# ======================================================
+# LAZY, FORK-SAFE PROVIDER REGISTRY
+# ======================================================
+# External clients, heavy parsers and worker pools are built on first
+# use instead of at import time. Instances are tied to the process that
+# created them, so a pre-forked worker builds its own on first use
+# rather than inheriting sockets, threads or pools from the parent.
+
+_factories = {}
+_instances = {}   # name -> (pid, instance)
+_lock = threading.RLock()   # factories may get() other providers
+
+
+def register(name: str, factory):
+    _factories[name] = factory
+
+
+def get(name: str):
+    pid = os.getpid()
+    entry = _instances.get(name)
+    if entry is not None and entry[0] == pid:
+        return entry[1]
+
+    with _lock:
+        entry = _instances.get(name)
+        if entry is None or entry[0] != pid:
+            entry = (pid, _factories[name]())
+            _instances[name] = entry
+    return entry[1]
+
+
+def require_env(*names: str) -> list:
+    """
+    Values of the given environment variables; raises if any is unset.
+    """
+    values = [os.getenv(n) for n in names]
+    missing = [n for n, v in zip(names, values) if not v]
+    if missing:
+        raise RuntimeError(f"{' / '.join(missing)} is not set")
+    return values
+
+
+def _reset_after_fork():
+    global _lock
+    _lock = threading.RLock()
+    _instances.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
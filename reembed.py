@@ -0,0 +1,156 @@
+"""
+Re-embeds stored rows with the configured embedding backend.
+
+Run after changing EMBED_BACKEND / JINA_MODEL / LOCAL_EMBED_MODEL, with
+the new settings in the environment:
+
+    EMBED_BACKEND=local python reembed.py
+    EMBED_BACKEND=local python reembed.py --tables facts claims
+
+Progress is checkpointed per (model, table), so an interrupted run
+resumes where it stopped.
+"""
+import os
+import json
+import argparse
+
+from embeddings import MODEL_ID, embed_many
+from db import (
+    fetch_page, insert_many, update_many, delete, table_signature, db_errors
+)
+from cache import CACHE_DIR
+
+# table -> text column that was embedded
+TABLES = {
+    "constitution_articles": "article_text",
+    "facts": "facts",
+    "claims": "text"
+}
+# Rewritten as new rows (old ones deleted) so table_signature changes
+# and every process rebuilds its local constitution index
+REINSERT = {"constitution_articles"}
+
+PAGE_SIZE = 100
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, "reembed_checkpoint.json")
+
+
+# --------------------------------------------------
+# CHECKPOINT (per table: last migrated id, newest id at start)
+# --------------------------------------------------
+def load_checkpoint():
+    try:
+        with open(CHECKPOINT_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("model") == MODEL_ID:
+            return data.get("tables", {})
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_checkpoint(tables):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"model": MODEL_ID, "tables": tables}, f)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+# --------------------------------------------------
+# MIGRATION
+# --------------------------------------------------
+def reembed_table(table, column, checkpoint, page_size=PAGE_SIZE):
+    """
+    Re-embeds rows up to the newest id seen when the table was first
+    visited (rows re-inserted by this run are never revisited). Only
+    the embedding column is written; rows with empty text get NULL
+    rather than keeping a vector from the old model.
+    Returns the number of rows rewritten.
+    """
+    state = checkpoint.get(table)
+    if state is None:
+        signature = table_signature(table)
+        if signature is None:
+            raise RuntimeError(f"❌ Could not read {table}")
+        state = {"after": None, "until": signature[1]}
+    after, last_id = state["after"], state["until"]
+
+    # Re-inserted tables copy whole rows; the rest only need the text
+    columns = None if table in REINSERT else ["id", column]
+
+    done = 0
+    while last_id is not None and (after is None or after < last_id):
+        try:
+            rows = fetch_page(
+                table, columns=columns, after=after, limit=page_size,
+                strict=True
+            )
+        except db_errors() as e:
+            raise RuntimeError(
+                f"❌ Could not read {table} after id {after}: {e}; "
+                "rerun to resume"
+            ) from e
+        # Keyset on id > after: deleted rows (even `until`) are no gap
+        rows = [r for r in rows if r["id"] <= last_id]
+        if not rows:
+            break
+
+        vectors = embed_many([r.get(column) for r in rows])
+        updated = [
+            {**r, "embedding": vec} for r, vec in zip(rows, vectors)
+        ]
+
+        if table in REINSERT:
+            fresh = [{k: v for k, v in r.items() if k != "id"} for r in updated]
+            results = insert_many(table, fresh)
+            ids = [r["id"] for r, res in zip(updated, results) if res["ok"]]
+            if ids:
+                delete(table, {"id": ids})
+        else:
+            results = update_many(table, [
+                {"id": r["id"], "embedding": r["embedding"]} for r in updated
+            ])
+
+        failed = [r["id"] for r, res in zip(updated, results) if not res["ok"]]
+        if failed:
+            raise RuntimeError(
+                f"❌ {table}: {len(failed)} rows failed (first id "
+                f"{failed[0]}); rerun to resume"
+            )
+
+        done += len(updated)
+        after = rows[-1]["id"]
+        checkpoint[table] = {"after": after, "until": last_id}
+        save_checkpoint(checkpoint)
+        print(f"   {table}: through id {after} ({done} rows)")
+
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--tables", nargs="+", choices=sorted(TABLES), default=list(TABLES)
+    )
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    print(f"🔁 Re-embedding with {MODEL_ID}")
+    checkpoint = load_checkpoint()
+
+    for table in args.tables:
+        n = reembed_table(
+            table, TABLES[table], checkpoint,
+            page_size=max(1, args.page_size)
+        )
+        print(f"📊 {table}: {n} rows re-embedded")
+
+    # Completed: a later backend change starts from scratch
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+    print("✅ Stored embeddings migrated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import os
+import time
+import random
+import threading
+
+# ======================================================
+# SHARED RESILIENCE (Supabase, Jina, Gemini)
+# ======================================================
+# Every outbound call goes through a Provider:
+# - token-bucket rate limit (waits instead of flooding the API)
+# - retries with exponential backoff + full jitter
+# - circuit breaker that fails fast while a provider is down
+
+
+class TransientError(RuntimeError):
+    """
+    Raised by call sites for retryable responses (429 / 5xx).
+    """
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes one token, sleeping until one is available.
+        Returns the seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures;
+    open -> half-open after `reset_timeout` (one trial call);
+    half-open -> closed on success, open again on failure. A neutral
+    outcome changes nothing but lets the next call be the trial.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trial = False   # a half-open trial call is in flight
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and \
+                    time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self.trial = False
+
+    def neutral(self):
+        """
+        The call ended without saying anything about provider health.
+        """
+        with self._lock:
+            self.trial = False
+
+    def failure(self) -> bool:
+        """
+        Records a failure; returns True if this tripped the breaker.
+        """
+        with self._lock:
+            self.failures += 1
+            self.trial = False
+            if self.state == "half_open" or (
+                self.state == "closed" and self.failures >= self.threshold
+            ):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class Provider:
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        retries: int = 3,
+        base_delay: float = 0.3,
+        max_delay: float = 8.0,
+        threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(threshold, reset_timeout)
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "trips": 0,
+            "rejected": 0,
+            "throttled": 0,
+            "throttle_seconds": 0.0
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform over [0, capped exponential]
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def call(self, fn, retries: int = None, retry_on=(TransientError,)):
+        """
+        Runs `fn()` under this provider's rate limit, retry policy and
+        circuit breaker. Exceptions outside `retry_on` propagate at once
+        and are neutral for the breaker (neither success nor failure).
+        """
+        retries = self.retries if retries is None else max(1, retries)
+
+        for attempt in range(retries):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise CircuitOpen(f"{self.name} circuit is open")
+
+            waited = self.bucket.acquire()
+            if waited:
+                self._count("throttled")
+                self._count("throttle_seconds", waited)
+
+            self._count("calls")
+            try:
+                result = fn()
+            except retry_on:
+                self._count("failures")
+                if self.breaker.failure():
+                    self._count("trips")
+                if attempt == retries - 1:
+                    raise
+                self._count("retries")
+                time.sleep(self.backoff(attempt))
+            except BaseException:
+                # Not a provider failure, but no proof of health either
+                self.breaker.neutral()
+                raise
+            else:
+                self.breaker.success()
+                return result
+
+
+def _provider(name: str, rate: float, burst: int) -> Provider:
+    prefix = name.upper()
+    return Provider(
+        name,
+        rate=float(os.getenv(f"{prefix}_RATE", str(rate))),
+        burst=int(os.getenv(f"{prefix}_BURST", str(burst))),
+        retries=int(os.getenv(f"{prefix}_RETRIES", "3")),
+        threshold=int(os.getenv(f"{prefix}_BREAKER_THRESHOLD", "5")),
+        reset_timeout=float(os.getenv(f"{prefix}_BREAKER_RESET", "30"))
+    )
+
+
+PROVIDERS = {
+    "supabase": _provider("supabase", rate=50, burst=100),
+    "jina": _provider("jina", rate=10, burst=20),
+    "gemini": _provider("gemini", rate=5, burst=10)
+}
+
+
+def get(name: str) -> Provider:
+    return PROVIDERS[name]
+
+
+def stats() -> dict:
+    return {
+        name: {**p.stats, "state": p.breaker.state}
+        for name, p in PROVIDERS.items()
+    }
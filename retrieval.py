@@ -0,0 +1,373 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Any, NamedTuple
+import numpy as np
+
+from bm25 import BM25Index
+from cache import CACHE_DIR
+from db import fetch, fetch_similar_constitution_articles, table_signature
+from embeddings import embed, embed_many
+
+# ------------------------------
+# Config
+# ------------------------------
+# Opt-in: serve top-k from an in-process matrix instead of the RPC
+LOCAL_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "0") == "1"
+INDEX_REFRESH_SECONDS = float(os.getenv("INDEX_REFRESH_SECONDS", "300"))
+
+# Hybrid ranking: Article-number matches, then BM25 + vector fused by
+# reciprocal rank over the top HYBRID_CANDIDATES of each
+HYBRID = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+TABLE = "constitution_articles"
+INDEX_DIR = os.path.join(CACHE_DIR, "constitution_index")
+
+
+def _as_vector(value):
+    # pgvector columns come back from PostgREST as "[0.1,0.2,...]"
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+
+def _cosines(matrix, vector):
+    if matrix is None or vector is None:
+        return None
+    q = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    if norm == 0:
+        return None
+    return matrix @ (q / norm)
+
+
+def _top(scores, k: int):
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def rrf(rankings, k: int = RRF_K) -> list:
+    """
+    Reciprocal rank fusion: ids ordered by sum(1 / (k + rank)).
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=lambda d: -fused[d])
+
+
+# ------------------------------
+# Local vector index
+# ------------------------------
+class _Snapshot(NamedTuple):
+    """
+    Everything one search reads, swapped in as a unit on refresh.
+    `vector_rows[j]` is the position in `rows` of matrix row j (rows
+    without an embedding are searchable lexically only).
+    """
+    rows: list
+    positions: dict
+    lexical: BM25Index
+    matrix: Any
+    vector_rows: Any
+
+
+class ConstitutionIndex:
+    """
+    In-process index of constitution articles: BM25 over title and
+    text, plus (with `vectors`) a unit-normalised float32 matrix of
+    their embeddings, memory-mapped from disk and searched with a single
+    matrix-vector product. Without `vectors` no embedding is fetched.
+    """
+
+    def __init__(self, directory: str = INDEX_DIR, vectors: bool = True):
+        self.directory = directory
+        self.vectors = vectors
+        self.snapshot = None
+        self.signature = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.directory, "meta.json")
+
+    @staticmethod
+    def _matrix_name(signature) -> str:
+        # One file per table version: meta.json names the matrix it was
+        # built with, so a reader never pairs rows with another build
+        digest = hashlib.sha256(repr(tuple(signature)).encode()).hexdigest()
+        return f"embeddings-{digest[:16]}.npy"
+
+    def _write_atomic(self, name: str, write):
+        # Per-process temp file, then rename: concurrent rebuilds never
+        # share a partial file, and a mapped file is never truncated
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, os.path.join(self.directory, name))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _remove_stale(self, keep: str):
+        for name in os.listdir(self.directory):
+            if name.startswith("embeddings") and name.endswith(".npy") \
+                    and name != keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _publish(self, rows, matrix, vector_rows):
+        self.snapshot = _Snapshot(
+            rows=rows,
+            positions={r["id"]: i for i, r in enumerate(rows)},
+            lexical=BM25Index(rows),
+            matrix=matrix,
+            vector_rows=np.asarray(vector_rows, dtype=np.int64)
+        )
+
+    def _load_from_disk(self, signature) -> bool:
+        try:
+            with open(self._meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if tuple(meta["signature"]) != tuple(signature):
+                return False
+            vector_rows = meta["vector_rows"]
+            matrix = None
+            if vector_rows:
+                matrix = np.load(
+                    os.path.join(self.directory, meta["matrix"]),
+                    mmap_mode="r"
+                )
+                if matrix.shape[0] != len(vector_rows):
+                    return False
+            self._publish(meta["rows"], matrix, vector_rows)
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _rebuild(self, signature) -> bool:
+        columns = ["id", "article_title", "article_text"]
+        if self.vectors:
+            columns.append("embedding")
+
+        rows, vectors, vector_rows = [], [], []
+        for r in fetch(TABLE, columns=columns):
+            vec = _as_vector(r.get("embedding"))
+            if vec:
+                vector_rows.append(len(rows))
+                vectors.append(vec)
+            rows.append({
+                "id": r.get("id"),
+                "article_title": r.get("article_title"),
+                "article_text": r.get("article_text")
+            })
+
+        if not rows:
+            return False  # failed read; never persist an empty index
+
+        if not self.vectors:
+            self._publish(rows, None, [])
+            return True
+
+        matrix, name = None, self._matrix_name(signature)
+        os.makedirs(self.directory, exist_ok=True)
+        if vectors:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1.0, norms)
+            self._write_atomic(name, lambda f: np.save(f, matrix))
+
+        meta = json.dumps({
+            "signature": list(signature),
+            "rows": rows,
+            "vector_rows": vector_rows,
+            "matrix": name
+        }).encode("utf-8")
+        self._write_atomic("meta.json", lambda f: f.write(meta))
+        self._remove_stale(keep=name)
+
+        # Publish what was just built, not whatever is on disk now
+        self._publish(rows, matrix, vector_rows)
+        return True
+
+    def refresh(self, force: bool = False):
+        """
+        Reloads the index when the article table has changed.
+        The table signature is re-checked at most every
+        INDEX_REFRESH_SECONDS.
+        """
+        now = time.monotonic()
+        if not force and self.snapshot is not None \
+                and now - self.checked_at < INDEX_REFRESH_SECONDS:
+            return
+
+        with self._lock:
+            if not force and self.snapshot is not None \
+                    and now - self.checked_at < INDEX_REFRESH_SECONDS:
+                return
+
+            signature = table_signature(TABLE)
+            self.checked_at = now
+            if signature is None:
+                return  # keep serving the current snapshot
+            if not force and signature == self.signature:
+                return
+            loaded = self.vectors and not force \
+                and self._load_from_disk(signature)
+            if loaded or self._rebuild(signature):
+                self.signature = signature
+
+    @staticmethod
+    def _similarities(snap, vector):
+        """
+        Cosine per row position (NaN where a row has no embedding),
+        or None without a usable query vector / matrix.
+        """
+        scores = _cosines(snap.matrix, vector)
+        if scores is None:
+            return None
+        out = np.full(len(snap.rows), np.nan, dtype=np.float32)
+        out[snap.vector_rows] = scores
+        return out
+
+    def search_vector(self, vector, top_k: int = 5):
+        self.refresh()
+        snap = self.snapshot
+        if snap is None:
+            return []
+        sims = self._similarities(snap, vector)
+        if sims is None:
+            return []
+
+        ranked = np.where(np.isnan(sims), -np.inf, sims)
+        return [
+            {**snap.rows[i], "similarity": float(sims[i])}
+            for i in _top(ranked, min(top_k, len(snap.vector_rows)))
+        ]
+
+    def search_hybrid(self, text: str, top_k: int = 5, vector_rows=None,
+                      vector=None):
+        """
+        Article-number matches first, then BM25 and vector rankings
+        fused by reciprocal rank. `vector_rows` (e.g. from the RPC)
+        replaces the local vector ranking; `vector` is a precomputed
+        query embedding. Rows found only lexically carry similarity
+        None unless the local matrix scored them.
+        """
+        self.refresh()
+        snap = self.snapshot
+        if snap is None:
+            if vector_rows is not None:
+                return vector_rows[:top_k]
+            return []
+
+        sims = None
+        if vector_rows is None:
+            if snap.matrix is not None and vector is None:
+                vector = embed(text)
+            sims = self._similarities(snap, vector)
+            vector_rows = []
+            if sims is not None:
+                ranked = np.where(np.isnan(sims), -np.inf, sims)
+                k = min(HYBRID_CANDIDATES, len(snap.vector_rows))
+                vector_rows = [
+                    {**snap.rows[i], "similarity": float(sims[i])}
+                    for i in _top(ranked, k)
+                ]
+
+        exact = [snap.rows[i]["id"] for i in snap.lexical.exact(text)]
+        fused = rrf([
+            [r["id"] for r in vector_rows],
+            [
+                snap.rows[i]["id"]
+                for i, _ in snap.lexical.search(text, HYBRID_CANDIDATES)
+            ]
+        ])
+
+        known = {r["id"]: r for r in vector_rows}
+        out = []
+        for doc_id in dict.fromkeys(exact + fused):
+            if len(out) >= top_k:
+                break
+            if doc_id in known:
+                out.append(known[doc_id])
+                continue
+            i = snap.positions.get(doc_id)
+            if i is None:
+                continue
+            similarity = None
+            if sims is not None and not np.isnan(sims[i]):
+                similarity = float(sims[i])
+            out.append({**snap.rows[i], "similarity": similarity})
+        return out
+
+    def search(self, text: str, top_k: int = 5, vector=None):
+        if HYBRID:
+            return self.search_hybrid(text, top_k, vector=vector)
+        if vector is None:
+            vector = embed(text)
+        return self.search_vector(vector, top_k)
+
+
+_index = ConstitutionIndex()
+# BM25 only, for fusing with the RPC when the local vector index is off
+_lexical_index = ConstitutionIndex(vectors=False)
+
+
+# ------------------------------
+# Public API
+# ------------------------------
+def query_vectors(texts: list) -> list:
+    """
+    Batched query embeddings for similar_articles(vector=...). All None
+    when retrieval runs in the database, which embeds server-side, or
+    when the embedding backend is unavailable.
+    """
+    if LOCAL_INDEX:
+        try:
+            return embed_many(texts)
+        except Exception:
+            pass
+    return [None] * len(texts)
+
+
+def similar_articles(text: str, top_k: int = 5, vector=None):
+    """
+    Top-k constitution articles for `text`, in the same row shape as
+    the match_constitution_articles RPC.
+    """
+    if LOCAL_INDEX:
+        try:
+            rows = _index.search(text, top_k, vector=vector)
+            if rows:
+                return rows
+        except Exception:
+            pass  # fall back to the database
+
+    if not HYBRID:
+        return fetch_similar_constitution_articles(text, top_k=top_k)
+
+    # Vector candidates from the database, fused with the in-process
+    # lexical index
+    rows = fetch_similar_constitution_articles(
+        text, top_k=max(top_k, HYBRID_CANDIDATES)
+    )
+    index = _index if LOCAL_INDEX else _lexical_index
+    try:
+        return index.search_hybrid(text, top_k, vector_rows=rows)
+    except Exception:
+        return rows[:top_k]
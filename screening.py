@@ -0,0 +1,95 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import providers
+from llm import constitutional_check, maintainability_check
+from retrieval import similar_articles, query_vectors
+
+# ------------------------------
+# Config
+# ------------------------------
+# Checks in flight across all batch requests (each incident runs two)
+SCREEN_CONCURRENCY = int(os.getenv("SCREEN_CONCURRENCY", "8"))
+SCREEN_BATCH_LIMIT = int(os.getenv("SCREEN_BATCH_LIMIT", "500"))
+# Incidents one batch request keeps in flight on the shared pool
+SCREEN_WINDOW = int(os.getenv("SCREEN_WINDOW", str(SCREEN_CONCURRENCY)))
+STOP_POLL_SECONDS = 0.5
+
+providers.register("screen_pool", lambda: ThreadPoolExecutor(
+    max_workers=max(1, SCREEN_CONCURRENCY),
+    thread_name_prefix="screen"
+))
+
+
+def _constitutional(incident: str, vector=None) -> dict:
+    articles = similar_articles(incident, top_k=5, vector=vector)
+    return constitutional_check(incident, articles)
+
+
+def screen(incident: str) -> dict:
+    return {
+        "constitutional": _constitutional(incident),
+        "maintainability": maintainability_check(incident)
+    }
+
+
+def screen_many(incidents: list, stop=None):
+    """
+    Yields {"index", "constitutional", "maintainability"} per incident
+    as soon as both of its checks finish, in completion order. Query
+    embeddings are batched up front; a failed item yields
+    {"index", "error"} instead.
+
+    At most SCREEN_WINDOW incidents are on the shared pool at a time,
+    refilled as they complete. Setting `stop` (a threading.Event)
+    cancels the checks not yet started and ends the stream.
+    """
+    pool = providers.get("screen_pool")
+    vectors = query_vectors(incidents)
+
+    todo = deque()
+    for i, (incident, vector) in enumerate(zip(incidents, vectors)):
+        if not incident or not incident.strip():
+            yield {"index": i, "error": "empty incident"}
+            continue
+        todo.append((i, incident, vector))
+
+    futures, pending = {}, {}
+
+    def fill():
+        while todo and len(futures) < 2 * max(1, SCREEN_WINDOW):
+            i, incident, vector = todo.popleft()
+            pending[i] = {}
+            futures[pool.submit(_constitutional, incident, vector)] = \
+                (i, "constitutional")
+            futures[pool.submit(maintainability_check, incident)] = \
+                (i, "maintainability")
+
+    try:
+        fill()
+        while futures:
+            if stop is not None and stop.is_set():
+                return
+            done, _ = wait(
+                futures,
+                timeout=STOP_POLL_SECONDS if stop is not None else None,
+                return_when=FIRST_COMPLETED
+            )
+            for fut in done:
+                i, check = futures.pop(fut)
+                if i not in pending:
+                    continue  # sibling check already failed
+                try:
+                    pending[i][check] = fut.result()
+                except Exception as e:
+                    del pending[i]
+                    yield {"index": i, "error": f"{type(e).__name__}: {e}"}
+                    continue
+                if len(pending[i]) == 2:
+                    yield {"index": i, **pending.pop(i)}
+            fill()
+    finally:
+        # Stopped or client went away: drop checks that have not started
+        for fut in futures:
+            fut.cancel()
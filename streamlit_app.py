@@ -27,6 +27,9 @@ if "case_id" not in st.session_state:
 if "screening_result" not in st.session_state:
     st.session_state.screening_result = None
 
+if "history_cache" not in st.session_state:
+    st.session_state.history_cache = None
+
 # ======================================================
 # HOME
 # ======================================================
@@ -150,15 +153,30 @@ elif st.session_state.page == "active":
     case_id = st.session_state.case_id
     st.subheader(f"📂 Active Case — ID {case_id}")
 
+    # Revalidate with the last ETag; 304 means the cached copy is current
+    cached = st.session_state.history_cache
+    headers = {}
+    if cached and cached["case_id"] == case_id:
+        headers["If-None-Match"] = cached["etag"]
+
     with st.spinner("Loading case history..."):
-        res = requests.get(f"{BACKEND_URL}/case/{case_id}/history")
+        res = requests.get(
+            f"{BACKEND_URL}/case/{case_id}/history", headers=headers
+        )
 
-    if res.status_code != 200:
+    if res.status_code == 304:
+        history = cached["history"]
+    elif res.status_code == 200:
+        history = res.json()
+        st.session_state.history_cache = {
+            "case_id": case_id,
+            "etag": res.headers.get("ETag", ""),
+            "history": history
+        }
+    else:
         st.error("Failed to load case history")
         st.stop()
 
-    history = res.json()
-
     # ---------------- Incident ----------------
     st.markdown("### 🗂 Incident")
     if history["incident"]:
@@ -234,7 +252,10 @@ elif st.session_state.page == "active":
                     }
                 )
             if res.status_code == 200:
-                st.success("Evidence uploaded successfully")
+                st.success(
+                    "Evidence uploaded — processing in background "
+                    f"(job {res.json().get('job_id')})"
+                )
                 st.rerun()
             else:
                 st.error("Evidence upload failed")
@@ -280,7 +301,10 @@ elif st.session_state.page == "active":
                     }
                 )
             if res.status_code == 200:
-                st.success("Evidence uploaded successfully")
+                st.success(
+                    "Evidence uploaded — processing in background "
+                    f"(job {res.json().get('job_id')})"
+                )
                 st.rerun()
             else:
                 st.error("Evidence upload failed")
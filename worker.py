@@ -0,0 +1,37 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from jobs import INGEST_WORKERS, get_store, run_job
+
+POLL_INTERVAL = float(os.getenv("INGEST_POLL_INTERVAL", "1.0"))
+
+
+def main():
+    """
+    Standalone ingestion worker.
+    Run alongside the API with INGEST_MODE=external.
+    """
+    store = get_store()
+    recovered = store.recover()
+    print(f"🛠 Ingestion worker started ({INGEST_WORKERS} threads, "
+          f"{len(recovered)} queued)")
+
+    with ThreadPoolExecutor(max_workers=INGEST_WORKERS) as pool:
+        running = set()
+        while True:
+            running = {f for f in running if not f.done()}
+            if len(running) >= INGEST_WORKERS:
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            job = store.claim()
+            if job is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            running.add(pool.submit(run_job, job))
+
+
+if __name__ == "__main__":
+    main()